@@ -1,37 +1,73 @@
-import base64
 import hashlib
+import importlib.util
 import io
-import json
 import os
+import time
 import uuid
-from datetime import datetime, date, timedelta
+from datetime import datetime, timedelta
 
 import pandas as pd
 import streamlit as st
-from PIL import Image
-
-# Try to import Cloudinary, but allow app to work without it
-try:
-    import cloudinary
-    import cloudinary.uploader
-    import cloudinary.api
-    CLOUDINARY_AVAILABLE = True
-except ImportError:
-    CLOUDINARY_AVAILABLE = False
+from streamlit.errors import StreamlitAPIException
+
+import blob_store
+import commit_queue
+import contest_state
+import image_cache
+import ingest
+import perf
+import profiling
+import remote_uploads
+import renditions
+import results_snapshot
+import snapshot_cache
+import startup
+import storage
+import user_directory
+import vote_journal
+
+# Cloudinary is optional; it is imported on first use (see cloudinary_uploader) to keep cold start short
+CLOUDINARY_AVAILABLE = importlib.util.find_spec("cloudinary") is not None
 
 
 # Paths
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
-PHOTOS_DIR = os.path.join(BASE_DIR, "photos")
+# Overridable so benchmarks and tools can point the app at a scratch directory
+DATA_DIR = os.environ.get("PHOTO_CONTEST_DATA_DIR", os.path.join(BASE_DIR, "data"))
+PHOTOS_DIR = os.environ.get("PHOTO_CONTEST_PHOTOS_DIR", os.path.join(BASE_DIR, "photos"))
 PHOTOS_CSV = os.path.join(DATA_DIR, "photos.csv")
 RATINGS_CSV = os.path.join(DATA_DIR, "ratings.csv")
 CONFIG_FILE = os.path.join(DATA_DIR, "config.json")
 USERS_CSV = os.path.join(DATA_DIR, "users.csv")
+DB_FILE = os.path.join(DATA_DIR, "contest.db")
+VOTE_JOURNAL_FILE = os.path.join(DATA_DIR, "votes.journal")
+BLOBS_DIR = os.path.join(DATA_DIR, "blobs")
+IMAGE_CACHE_DIR = os.path.join(DATA_DIR, "image_cache")
+PERF_LOG_FILE = os.path.join(DATA_DIR, "logs", "perf.jsonl")
+STARTUP_REPORT_FILE = os.path.join(DATA_DIR, "logs", "startup.json")
+PROFILES_DIR = os.path.join(DATA_DIR, "profiles")
+RESULTS_FILE = os.path.join(DATA_DIR, "results.json")
 
 # Configuration
 ADMIN_USERNAME = "alphabetagamma"  # Admin username for contest control
 MAX_PHOTOS_PER_USER = 2  # Maximum photos a user can upload
+VOTE_JOURNAL_FSYNC = "interval"  # "always" (fsync every vote), "interval" (once per second) or "never"
+VOTE_COMPACT_INTERVAL_SECONDS = 30  # How often the vote journal is folded into the database
+IMAGE_CACHE_MEMORY_MB = 64  # In-memory image cache shared by all sessions
+IMAGE_CACHE_DISK_MB = 512  # On-disk cache of remote images (least recently used entries go first)
+IMAGE_FETCH_WORKERS = 8  # Concurrent image fetches shared by all sessions
+IMAGE_BATCH_DEADLINE_SECONDS = 15  # Longest a gallery waits for its images
+# "passthrough": browsers load Cloudinary photos straight from the CDN, resized there;
+# "server": the app downloads them and serves the bytes itself
+IMAGE_RENDER_MODE = "passthrough"
+GRID_SLOT_PX = 360  # Approximate width of a photo in the 3-across grids
+CARD_SLOT_PX = 540  # Approximate width of a photo in the 2-across moderation grid
+REMOTE_UPLOAD_WORKERS = 2  # Background Cloudinary uploads running at once
+UPLOAD_MAX_EDGE_PX = 2048  # Uploads are downscaled to this longest edge at ingest
+UPLOAD_MAX_PIXELS = 100_000_000  # Larger uploads are refused before decoding
+PERF_ENABLED = os.environ.get("PHOTO_CONTEST_PERF") == "1"  # Record timings from startup (admins can also toggle it)
+PROFILE_TOP_N = 25  # Functions and allocation sites listed for a one-shot profile
+GALLERY_PAGE_SIZE = 12  # Photos per page in the voting gallery (a multiple of 3 fills every row)
 THEMES = [
     "Happy Department is an Efficient Department",
     "New Income Tax Act",
@@ -191,87 +227,106 @@ div[data-testid="stSelectbox"] select:hover {
     )
 
 
+def get_storage() -> storage.Storage:
+    """Return the process-wide SQLite storage engine."""
+    return storage.open_storage(DB_FILE)
+
+
+def get_blob_store() -> blob_store.BlobStore:
+    """Return the process-wide content-addressed image store."""
+    return blob_store.open_blob_store(BLOBS_DIR)
+
+
+def get_image_cache() -> image_cache.ImageCache:
+    """Return the process-wide image cache (memory LRU in front of a disk cache)."""
+    return image_cache.open_image_cache(
+        IMAGE_CACHE_DIR,
+        max_memory_bytes=IMAGE_CACHE_MEMORY_MB * 1024 * 1024,
+        max_disk_bytes=IMAGE_CACHE_DISK_MB * 1024 * 1024,
+        fetch_workers=IMAGE_FETCH_WORKERS,
+    )
+
+
+def get_commit_queue() -> commit_queue.CommitQueue:
+    """Return the process-wide single writer that group-commits database mutations."""
+    return commit_queue.open_commit_queue(get_storage())
+
+
+def get_user_directory() -> user_directory.UserDirectory:
+    """Return the process-wide employee_id index over the users table."""
+    return user_directory.open_user_directory(
+        get_storage(),
+        write=lambda user: get_commit_queue().run(get_storage().upsert_user, user),
+    )
+
+
+def get_vote_journal() -> vote_journal.VoteJournal:
+    """Return the process-wide vote journal in front of the ratings table."""
+    return vote_journal.open_journal(
+        VOTE_JOURNAL_FILE,
+        get_storage(),
+        fsync=VOTE_JOURNAL_FSYNC,
+        compact_interval=VOTE_COMPACT_INTERVAL_SECONDS,
+    )
+
+
 def ensure_structure() -> None:
-    """Create required folders and CSV files if missing."""
+    """Create required folders, the database and the config file if missing."""
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(PHOTOS_DIR, exist_ok=True)
 
-    if not os.path.exists(PHOTOS_CSV):
-        pd.DataFrame(
-            columns=[
-                "photo_id",
-                "title",
-                "filename",
-                "uploader",
-                "uploaded_at",
-                "status",
-                "rejection_reason",
-                "theme",
-            ]
-        ).to_csv(PHOTOS_CSV, index=False)
-    if not os.path.exists(RATINGS_CSV):
-        pd.DataFrame(columns=["photo_id", "user_id", "rating"]).to_csv(RATINGS_CSV, index=False)
-    
-    if not os.path.exists(USERS_CSV):
-        pd.DataFrame(columns=["employee_id", "name", "posting_details", "is_admin"]).to_csv(
-            USERS_CSV, index=False
-        )
+    db = get_storage()
+    # One-time import of data written by the CSV-based versions of the app
+    if db.get_meta("csv_imported") is None:
+        if db.is_empty():
+            db.import_csv(PHOTOS_CSV, RATINGS_CSV, USERS_CSV, blob_store=get_blob_store())
+        db.set_meta("csv_imported", datetime.utcnow().isoformat())
+    # One-time move of base64 images stored by earlier versions into the blob store
+    if db.get_meta("blobs_migrated") is None:
+        db.migrate_base64_to_blobs(get_blob_store())
+        db.set_meta("blobs_migrated", datetime.utcnow().isoformat())
+    
+    # Start the background uploader, which requeues uploads a previous run left unfinished
+    if CLOUDINARY_AVAILABLE and is_cloudinary_configured():
+        get_remote_uploader()
     
     # Initialize config file with default values
     if not os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "w") as f:
-            json.dump({"upload_deadline": None, "voting_ended": False}, f)
+        save_config({"upload_deadline": None, "voting_ended": False})
 
 
-def load_data() -> tuple[pd.DataFrame, pd.DataFrame]:
-    try:
-        photos_df = pd.read_csv(PHOTOS_CSV)
-        # Ensure cloudinary_url and image_base64 columns exist for backward compatibility
-        if "cloudinary_url" not in photos_df.columns:
-            photos_df["cloudinary_url"] = None
-        if "image_base64" not in photos_df.columns:
-            photos_df["image_base64"] = None
-        # Ensure status and rejection_reason columns exist for moderation
-        needs_save = False
-        if "status" not in photos_df.columns:
-            photos_df["status"] = "approved"  # Set existing photos as approved for backward compatibility
-            needs_save = True
-        if "rejection_reason" not in photos_df.columns:
-            photos_df["rejection_reason"] = None
-            needs_save = True
-        # Fix any NaN or empty status values - set to approved for backward compatibility
-        if photos_df["status"].isna().any() or (photos_df["status"] == "").any():
-            photos_df["status"] = photos_df["status"].fillna("approved")
-            photos_df.loc[photos_df["status"] == "", "status"] = "approved"
-            needs_save = True
-        # Save only if we made changes
-        if needs_save:
-            photos_df.to_csv(PHOTOS_CSV, index=False)
-        # Ensure theme column exists
-        if "theme" not in photos_df.columns:
-            photos_df["theme"] = "Unspecified"
-    except pd.errors.EmptyDataError:
-        photos_df = pd.DataFrame(
-            columns=[
-                "photo_id",
-                "title",
-                "filename",
-                "uploader",
-                "uploaded_at",
-                "cloudinary_url",
-                "image_base64",
-                "status",
-                "rejection_reason",
-                "theme",
-            ]
-        )
+def initialize() -> None:
+    """Process-wide setup, run once per server process rather than on every rerun."""
+    # Lets the shared snapshots be handed out as shallow copies on pandas 2 (pandas 3 always has it)
+    startup.once("copy_on_write", snapshot_cache.enable_copy_on_write)
+    startup.once("ensure_structure", ensure_structure)
+    if PERF_ENABLED:
+        startup.once("perf", lambda: perf.enable(PERF_LOG_FILE))
 
-    try:
-        ratings_df = pd.read_csv(RATINGS_CSV)
-    except pd.errors.EmptyDataError:
-        ratings_df = pd.DataFrame(columns=["photo_id", "user_id", "rating"])
 
-    return photos_df, ratings_df
+def load_photos() -> pd.DataFrame:
+    """Load the photos table from storage (shared snapshot, re-read only after a change)."""
+    db = get_storage()
+    return snapshot_cache.get(
+        "photos", [DB_FILE, f"{DB_FILE}-wal"], db.photos_frame, generation=lambda: db.generation
+    )
+
+
+def load_ratings() -> pd.DataFrame:
+    """Load current votes: the database snapshot plus any votes still in the journal."""
+    db = get_storage()
+    journal = get_vote_journal()
+    return snapshot_cache.get(
+        "ratings",
+        [VOTE_JOURNAL_FILE, DB_FILE, f"{DB_FILE}-wal"],
+        journal.ratings_frame,
+        generation=lambda: db.generation + journal.generation,
+    )
+
+
+def load_data() -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Load photos and ratings tables from storage."""
+    return load_photos(), load_ratings()
 
 
 def hash_password(password: str) -> str:
@@ -281,35 +336,36 @@ def hash_password(password: str) -> str:
 
 
 def load_users() -> pd.DataFrame:
-    """Load users from CSV file."""
-    try:
-        return pd.read_csv(USERS_CSV)
-    except pd.errors.EmptyDataError:
-        return pd.DataFrame(columns=["employee_id", "name", "posting_details", "is_admin"])
+    """Load users from storage (shared snapshot, re-read only after a change)."""
+    db = get_storage()
+    return snapshot_cache.get(
+        "users", [DB_FILE, f"{DB_FILE}-wal"], db.users_frame, generation=lambda: db.generation
+    )
+
+
+def is_valid_employee_id(employee_id: str) -> bool:
+    """Employee IDs are non-empty and fit in a vote journal record."""
+    employee_id = employee_id.strip()
+    return bool(employee_id) and len(employee_id.upper().encode("utf-8")) <= vote_journal.MAX_ID_BYTES
 
 
 def login_or_create_user(employee_id: str, name: str, posting_details: str) -> tuple[bool, dict]:
     """Login or auto-create user. Returns (success, user_info_dict)."""
-    users_df = load_users()
+    directory = get_user_directory()
     employee_id = employee_id.strip().upper()
+    # Votes are journaled by employee ID, which must fit in a journal record
+    if not is_valid_employee_id(employee_id):
+        return False, {}
     name = name.strip()
     posting_details = posting_details.strip()
     
     # Check if user exists
-    if not users_df.empty:
-        # Convert employee_id column to string and handle NaN values
-        users_df["employee_id"] = users_df["employee_id"].astype(str).replace("nan", "")
-        user = users_df[users_df["employee_id"].str.upper() == employee_id]
-        if not user.empty:
-            # User exists, update info if changed
-            user_info = user.iloc[0].to_dict()
-            user_info["name"] = name
-            user_info["posting_details"] = posting_details
-            # Update in dataframe
-            users_df.loc[users_df["employee_id"].str.upper() == employee_id, "name"] = name
-            users_df.loc[users_df["employee_id"].str.upper() == employee_id, "posting_details"] = posting_details
-            users_df.to_csv(USERS_CSV, index=False)
-            return True, user_info
+    user_info = directory.get(employee_id)
+    if user_info is not None:
+        # User exists, update info if changed
+        user_info["name"] = name
+        user_info["posting_details"] = posting_details
+        return True, directory.upsert(user_info)
     
     # User doesn't exist, create new user
     new_user = {
@@ -318,24 +374,17 @@ def login_or_create_user(employee_id: str, name: str, posting_details: str) -> t
         "posting_details": posting_details,
         "is_admin": False
     }
-    
-    users_df = pd.concat([users_df, pd.DataFrame([new_user])], ignore_index=True)
-    users_df.to_csv(USERS_CSV, index=False)
-    return True, new_user
+    return True, directory.upsert(new_user)
 
 
 def authenticate_admin(username: str, password: str) -> tuple[bool, dict]:
     """Authenticate admin user. Returns (success, user_info_dict)."""
-    users_df = load_users()
-    
-    # Convert employee_id column to string and handle NaN values
-    if not users_df.empty:
-        users_df["employee_id"] = users_df["employee_id"].astype(str).replace("nan", "")
+    directory = get_user_directory()
     
     # Check if admin user exists, if not create it
-    admin_user = users_df[users_df["employee_id"].str.upper() == ADMIN_USERNAME.upper()] if not users_df.empty else pd.DataFrame()
+    admin_info = directory.get(ADMIN_USERNAME)
     
-    if admin_user.empty:
+    if admin_info is None:
         # Create admin user if doesn't exist
         new_admin = {
             "employee_id": ADMIN_USERNAME.upper(),
@@ -343,11 +392,7 @@ def authenticate_admin(username: str, password: str) -> tuple[bool, dict]:
             "posting_details": "Administrator",
             "is_admin": True
         }
-        users_df = pd.concat([users_df, pd.DataFrame([new_admin])], ignore_index=True)
-        users_df.to_csv(USERS_CSV, index=False)
-        return True, new_admin
-    
-    admin_info = admin_user.iloc[0].to_dict()
+        return True, directory.upsert(new_admin)
     
     # Simple admin authentication - username must match ADMIN_USERNAME
     # Password check can be enhanced later if needed
@@ -360,179 +405,282 @@ def authenticate_admin(username: str, password: str) -> tuple[bool, dict]:
 
 def get_user_photo_count(employee_id: str) -> int:
     """Get the number of photos uploaded by a user."""
-    photos_df, _ = load_data()
-    if photos_df.empty or "uploader" not in photos_df.columns:
-        return 0
-    
-    # Convert uploader column to string and handle NaN values
-    photos_df["uploader"] = photos_df["uploader"].astype(str)
-    # Filter out 'nan' strings
-    photos_df = photos_df[photos_df["uploader"] != "nan"]
-    # Exclude rejected photos from count so users can re-upload if rejected
-    if "status" in photos_df.columns:
-        photos_df = photos_df[photos_df["status"] != "rejected"]
-    
-    return len(photos_df[photos_df["uploader"].str.upper() == employee_id.upper()])
+    # Rejected photos are excluded from the count so users can re-upload if rejected
+    return get_storage().count_active_photos(employee_id)
 
 
-def is_cloudinary_configured() -> bool:
-    """Check if Cloudinary is configured via Streamlit secrets."""
+def _read_cloudinary_settings() -> dict:
     if not CLOUDINARY_AVAILABLE:
-        return False
+        return {}
     try:
         secrets = st.secrets.get("cloudinary", {})
-        return bool(secrets.get("cloud_name") and secrets.get("api_key") and secrets.get("api_secret"))
+        settings = {key: secrets.get(key) for key in ("cloud_name", "api_key", "api_secret")}
     except Exception:
-        return False
+        return {}
+    return settings if all(settings.values()) else {}
 
 
-def init_cloudinary() -> None:
-    """Initialize Cloudinary with credentials from Streamlit secrets."""
-    if not CLOUDINARY_AVAILABLE or not is_cloudinary_configured():
-        return
+def cloudinary_settings() -> dict:
+    """Cloudinary credentials from Streamlit secrets ({} if incomplete); read once per process."""
+    return startup.once("cloudinary_settings", _read_cloudinary_settings)
+
+
+def is_cloudinary_configured() -> bool:
+    """Check if Cloudinary is configured via Streamlit secrets."""
+    return bool(cloudinary_settings())
+
+
+def _configure_cloudinary():
+    import cloudinary
+    import cloudinary.uploader
+
+    cloudinary.config(**cloudinary_settings(), secure=True)
+    return cloudinary.uploader
+
+
+def cloudinary_uploader():
+    """cloudinary.uploader, imported and configured once per process on first use."""
+    return startup.once("cloudinary", _configure_cloudinary)
+
+
+def upload_to_cloudinary(photo_id: str, data: bytes) -> str:
+    """Upload an original to Cloudinary and return its URL (raises on failure)."""
+    upload_result = cloudinary_uploader().upload(
+        io.BytesIO(data),
+        public_id=f"photo_contest/{photo_id}",
+        folder="photo_contest",
+        resource_type="image"
+    )
+    return upload_result.get("secure_url") or upload_result["url"]
+
+
+def destroy_cloudinary_image(photo_id: str) -> None:
+    """Delete a photo's Cloudinary copy, ignoring failures."""
     try:
-        secrets = st.secrets.get("cloudinary", {})
-        cloudinary.config(
-            cloud_name=secrets.get("cloud_name"),
-            api_key=secrets.get("api_key"),
-            api_secret=secrets.get("api_secret"),
-            secure=True
-        )
+        cloudinary_uploader().destroy(f"photo_contest/{photo_id}", resource_type="image")
     except Exception:
-        pass
+        pass  # Continue even if Cloudinary delete fails
+
+
+def get_remote_uploader() -> remote_uploads.RemoteUploader:
+    """Return the process-wide background Cloudinary uploader (requeues unfinished uploads on first use)."""
+    return remote_uploads.open_remote_uploader(
+        get_storage(),
+        get_blob_store(),
+        upload_to_cloudinary,
+        discard=destroy_cloudinary_image,
+        on_uploaded=lambda photo_id: get_image_cache().invalidate(photo_id, IMAGE_CACHE_VARIANTS),
+        write=lambda fn, *args: get_commit_queue().run(fn, *args),
+        workers=REMOTE_UPLOAD_WORKERS,
+    )
+
+
+# Every cache key a photo can have, so all of them can be invalidated together
+IMAGE_CACHE_VARIANTS = list(renditions.RENDITIONS) + ["remote", "original", "file"]
 
 
-def get_photo_image(photo_row: pd.Series) -> Image.Image | None:
-    """Get photo image from Cloudinary (preferred), base64, or local file (fallback)."""
+def get_photo_bytes(photo_row: pd.Series, rendition: str = "full") -> bytes | None:
+    """Get encoded photo bytes: the requested local rendition if generated, else Cloudinary, the blob store, or local file."""
     photo_id = photo_row.get("photo_id", "")
+    cache = get_image_cache()
+    
+    # Downscaled renditions are generated at upload time (or by manage.py backfill-renditions)
+    rendition_key = photo_row.get(renditions.column(rendition))
+    if isinstance(rendition_key, str) and rendition_key:
+        image_data = cache.get(photo_id, rendition, lambda: get_blob_store().get(rendition_key))
+        if image_data:
+            return image_data
     
     # Try Cloudinary first (best for cloud deployment)
     if CLOUDINARY_AVAILABLE and is_cloudinary_configured() and photo_id:
-        try:
-            init_cloudinary()
-            # Check if cloudinary_url exists in the row
-            if "cloudinary_url" in photo_row and pd.notna(photo_row["cloudinary_url"]) and photo_row["cloudinary_url"]:
-                import requests
-                response = requests.get(photo_row["cloudinary_url"], timeout=10)
-                if response.status_code == 200:
-                    return Image.open(io.BytesIO(response.content))
-        except Exception:
-            pass
-    
-    # Try base64 (for backward compatibility)
-    if "image_base64" in photo_row and pd.notna(photo_row["image_base64"]) and photo_row["image_base64"]:
-        try:
-            image_data = base64.b64decode(photo_row["image_base64"])
-            return Image.open(io.BytesIO(image_data))
-        except Exception:
-            pass
+        cloudinary_url = photo_row.get("cloudinary_url")
+        if isinstance(cloudinary_url, str) and cloudinary_url:
+            image_data = cache.fetch(photo_id, "remote", cloudinary_url)
+            if image_data:
+                return image_data
+    
+    # Try the local blob store
+    image_sha256 = photo_row.get("image_sha256")
+    if isinstance(image_sha256, str) and image_sha256:
+        image_data = cache.get(photo_id, "original", lambda: get_blob_store().get(image_sha256))
+        if image_data:
+            return image_data
     
     # Fallback to local file
-    file_path = os.path.join(PHOTOS_DIR, photo_row.get("filename", ""))
+    filename = photo_row.get("filename")
+    file_path = os.path.join(PHOTOS_DIR, filename) if isinstance(filename, str) and filename else None
     if file_path and os.path.exists(file_path):
-        try:
-            return Image.open(file_path)
-        except Exception:
-            pass
+        return cache.get(photo_id, "file", lambda: _read_file(file_path))
     
     return None
 
 
+def cloudinary_delivery_url(url: str, width: int) -> str:
+    """Add width/quality/format delivery transformations to a Cloudinary upload URL."""
+    marker = "/image/upload/"
+    if marker not in url:
+        return url
+    base, rest = url.split(marker, 1)
+    return f"{base}{marker}w_{width},c_limit,q_auto,f_auto/{rest}"
+
+
+def get_delivery_url(photo_row: pd.Series, rendition: str = "full") -> str | None:
+    """Browser-facing URL for a Cloudinary photo in pass-through mode, else None."""
+    if IMAGE_RENDER_MODE != "passthrough":
+        return None
+    cloudinary_url = photo_row.get("cloudinary_url")
+    if not isinstance(cloudinary_url, str) or not cloudinary_url:
+        return None
+    return cloudinary_delivery_url(cloudinary_url, renditions.RENDITIONS[rendition])
+
+
+def get_photos_sources(photos_df: pd.DataFrame, rendition: str = "full") -> list[str | bytes | None]:
+    """What st.image should show for every row, in row order.
+
+    Cloudinary photos in pass-through mode become delivery URLs with no server-side
+    image I/O; the rest are resolved to bytes concurrently on the image fetch pool.
+    """
+    rows = [row for _, row in photos_df.iterrows()]
+    sources = [get_delivery_url(row, rendition) for row in rows]
+    pending = [i for i, source in enumerate(sources) if source is None]
+    if pending:
+        fetched = get_image_cache().map(
+            [lambda row=rows[i]: get_photo_bytes(row, rendition) for i in pending],
+            deadline=IMAGE_BATCH_DEADLINE_SECONDS,
+        )
+        for i, image_data in zip(pending, fetched):
+            sources[i] = image_data
+    return sources
+
+
+def _read_file(path: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def get_photo_image(photo_row: pd.Series, rendition: str = "full") -> "Image.Image | None":
+    """Get photo image decoded with PIL (see get_photo_bytes for the lookup order)."""
+    image_data = get_photo_bytes(photo_row, rendition)
+    if not image_data:
+        return None
+    from PIL import Image
+
+    try:
+        with perf.span("image.decode") as span:
+            image = Image.open(io.BytesIO(image_data))
+            image.load()
+            span.add_bytes(len(image_data))
+        return image
+    except Exception:
+        return None
+
+
 def save_photo(file, title: str, employee_id: str, theme: str) -> None:
-    """Persist uploaded photo and metadata. Upload to Cloudinary if configured, else use base64."""
-    ext = os.path.splitext(file.name)[1].lower()
+    """Persist uploaded photo and metadata; queue the Cloudinary upload if configured.
+
+    Raises ingest.IngestError if the file is rejected.
+    """
     photo_id = str(uuid.uuid4())
-    filename = f"{photo_id}{ext}"
-    file_path = os.path.join(PHOTOS_DIR, filename)
 
-    image = Image.open(file).convert("RGB")
+    # Validate, decode once at display size and encode once; every target gets these bytes
+    upload = ingest.ingest(file, max_edge=UPLOAD_MAX_EDGE_PX, max_pixels=UPLOAD_MAX_PIXELS)
     
-    # Save locally (for backward compatibility)
-    image.save(file_path)
-    
-    cloudinary_url = None
+    # Store the gallery renditions generated at ingest
+    rendition_keys = {
+        renditions.column(name): get_blob_store().put(data)
+        for name, data in upload.renditions.items()
+    }
     
-    # Upload to Cloudinary if configured (best for cloud deployment)
-    if CLOUDINARY_AVAILABLE and is_cloudinary_configured():
-        try:
-            init_cloudinary()
-            buffer = io.BytesIO()
-            image.save(buffer, format="JPEG", quality=85)
-            buffer.seek(0)
-            
-            upload_result = cloudinary.uploader.upload(
-                buffer,
-                public_id=f"photo_contest/{photo_id}",
-                folder="photo_contest",
-                resource_type="image"
-            )
-            cloudinary_url = upload_result.get("secure_url") or upload_result.get("url")
-        except Exception as e:
-            # If Cloudinary upload fails, fall back to base64
-            pass
-    
-    # Store as base64 if Cloudinary not configured or upload failed
-    image_base64 = None
-    if not cloudinary_url:
-        buffer = io.BytesIO()
-        image.save(buffer, format="JPEG", quality=85)
-        image_base64 = base64.b64encode(buffer.getvalue()).decode("utf-8")
+    # The original is always stored locally first; when Cloudinary is configured it is
+    # uploaded in the background and served from the blob store until that finishes
+    image_sha256 = get_blob_store().put(upload.master)
+    upload_remotely = CLOUDINARY_AVAILABLE and is_cloudinary_configured()
 
-    photos_df, _ = load_data()
     new_row = {
         "photo_id": photo_id,
         "title": title.strip(),
-        "filename": filename,
+        "filename": None,  # Uploads no longer keep a file in PHOTOS_DIR
         "uploader": employee_id.strip().upper(),
         "uploaded_at": datetime.utcnow().isoformat(),
-        "cloudinary_url": cloudinary_url,  # Cloudinary URL if available
-        "image_base64": image_base64,  # Base64 fallback if Cloudinary not used
+        "cloudinary_url": None,  # Set by the background uploader once the upload succeeds
+        "image_sha256": image_sha256,  # Blob store key of the original until it is on Cloudinary
+        "storage_state": "processing" if upload_remotely else "local",
         "status": "pending",  # New photos start as pending approval
         "rejection_reason": None,  # Rejection reason if rejected
         "theme": theme,
+        **rendition_keys,
     }
-    photos_df = pd.concat([photos_df, pd.DataFrame([new_row])], ignore_index=True)
-    photos_df.to_csv(PHOTOS_CSV, index=False)
+    get_commit_queue().run(get_storage().insert_photo, new_row)
+    if upload_remotely:
+        get_remote_uploader().submit(photo_id)
+
+
+def backfill_renditions() -> int:
+    """Generate missing renditions for photos uploaded before they existed. Returns photos updated."""
+    db = get_storage()
+    updated = 0
+    for _, row in db.photos_missing_renditions().iterrows():
+        image = get_photo_image(row)
+        if image is None:
+            continue
+        get_commit_queue().run(
+            db.set_renditions,
+            row["photo_id"],
+            {
+                renditions.column(name): get_blob_store().put(data)
+                for name, data in renditions.render(image.convert("RGB")).items()
+            },
+        )
+        updated += 1
+    return updated
+
+
+def bulk_set_photo_status(photo_ids: list[str], status: str, reason: str | None = None) -> int:
+    """Approve or reject many photos in one database write. Returns photos updated."""
+    if not photo_ids:
+        return 0
+    updated = get_commit_queue().run(get_storage().bulk_set_status, list(photo_ids), status, reason)
+    if status == "approved":
+        for photo_id in photo_ids:
+            get_image_cache().invalidate(photo_id, IMAGE_CACHE_VARIANTS)
+    return updated
 
 
 def approve_photo(photo_id: str) -> None:
     """Approve a pending photo, making it visible to all users."""
-    photos_df, _ = load_data()
-    photos_df.loc[photos_df["photo_id"] == photo_id, "status"] = "approved"
-    photos_df.loc[photos_df["photo_id"] == photo_id, "rejection_reason"] = None
-    photos_df.to_csv(PHOTOS_CSV, index=False)
+    get_commit_queue().run(get_storage().set_photo_status, photo_id, "approved", None)
+    get_image_cache().invalidate(photo_id, IMAGE_CACHE_VARIANTS)
 
 
 def reject_photo(photo_id: str, reason: str = "") -> None:
     """Reject a pending photo, keeping it hidden from other users."""
-    photos_df, _ = load_data()
-    photos_df.loc[photos_df["photo_id"] == photo_id, "status"] = "rejected"
-    photos_df.loc[photos_df["photo_id"] == photo_id, "rejection_reason"] = reason if reason else None
-    photos_df.to_csv(PHOTOS_CSV, index=False)
+    get_commit_queue().run(get_storage().set_photo_status, photo_id, "rejected", reason if reason else None)
 
 
 def delete_photo(photo_id: str) -> None:
     """Delete a photo: remove from Cloudinary, local file, and database entries."""
-    photos_df, ratings_df = load_data()
-    
-    # Find the photo to delete
-    photo_row = photos_df[photos_df["photo_id"] == photo_id]
-    if photo_row.empty:
+    # Remove the photo row and all of its ratings in one transaction
+    photo_data = get_commit_queue().run(get_storage().delete_photo, photo_id)
+    if photo_data is None:
         return
+    # Votes for it may still be in the journal tail
+    get_vote_journal().record_photo_deleted(photo_id)
+    get_image_cache().invalidate(photo_id, IMAGE_CACHE_VARIANTS)
     
-    photo_data = photo_row.iloc[0]
-    
-    # Delete from Cloudinary if configured
+    # Delete from Cloudinary if configured (an upload still in flight is discarded by the uploader)
     if CLOUDINARY_AVAILABLE and is_cloudinary_configured():
-        try:
-            init_cloudinary()
-            cloudinary_url = photo_data.get("cloudinary_url")
-            if cloudinary_url and pd.notna(cloudinary_url):
-                # Extract public_id from URL or use photo_id
-                public_id = f"photo_contest/{photo_id}"
-                cloudinary.uploader.destroy(public_id, resource_type="image")
-        except Exception:
-            pass  # Continue even if Cloudinary delete fails
+        cloudinary_url = photo_data.get("cloudinary_url")
+        if cloudinary_url and pd.notna(cloudinary_url):
+            destroy_cloudinary_image(photo_id)
+    
+    # Delete the stored image and renditions unless an identical upload still uses them
+    for column in ["image_sha256"] + renditions.COLUMNS:
+        key = photo_data.get(column)
+        if key and not get_storage().image_in_use(key):
+            get_blob_store().delete(key)
     
     # Delete the physical file
     filename = photo_data.get("filename")
@@ -543,60 +691,47 @@ def delete_photo(photo_id: str) -> None:
                 os.remove(file_path)
             except OSError:
                 pass  # File might already be deleted
-    
-    # Remove photo from photos.csv
-    photos_df = photos_df[photos_df["photo_id"] != photo_id]
-    photos_df.to_csv(PHOTOS_CSV, index=False)
-    
-    # Remove all ratings for this photo from ratings.csv
-    ratings_df = ratings_df[ratings_df["photo_id"] != photo_id]
-    ratings_df.to_csv(RATINGS_CSV, index=False)
 
 
-def save_rating(photo_id: str, user_id: str, rating: int) -> None:
-    """Record a single vote per user overall; moving vote rewrites the record."""
-    photos_df, ratings_df = load_data()
-    if photo_id not in set(photos_df["photo_id"]):
-        return
-
-    # Remove any existing vote by this user (across all photos)
-    ratings_df = ratings_df[ratings_df["user_id"] != user_id]
+def save_rating(photo_id: str, user_id: str, rating: int) -> bool:
+    """Record a single vote per user overall; moving a vote appends a new journal record.
 
-    # Insert the new vote
-    ratings_df = pd.concat(
-        [ratings_df, pd.DataFrame([{"photo_id": photo_id, "user_id": user_id, "rating": rating}])],
-        ignore_index=True,
+    Returns False, recording nothing, once voting has ended (results are frozen)
+    or if the photo no longer exists.
+    """
+    # Checked under the journal lock: set_voting_ended holds it exclusively while the phase flips, and
+    # delete_photo's drop record waits for it, so a vote never lands after its photo was dropped
+    return get_vote_journal().record_vote(
+        photo_id, user_id, rating,
+        accept=lambda: not get_voting_ended() and get_storage().photo_exists(photo_id),
     )
-    ratings_df.to_csv(RATINGS_CSV, index=False)
+
+
+def get_contest_state() -> contest_state.ContestState:
+    """Contest settings (deadline, voting ended, phase); parsed once and shared until config.json changes."""
+    return contest_state.load(CONFIG_FILE)
 
 
 def get_config() -> dict:
     """Read config file and return as dictionary."""
-    try:
-        with open(CONFIG_FILE, "r") as f:
-            config = json.load(f)
-            # Handle backward compatibility
-            if "upload_deadline" not in config:
-                # Migrate from old config format
-                if "voting_phase_enabled" in config:
-                    config["upload_deadline"] = None
-            return {
-                "upload_deadline": config.get("upload_deadline"),
-                "voting_ended": config.get("voting_ended", False)
-            }
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"upload_deadline": None, "voting_ended": False}
+    state = get_contest_state()
+    return {"upload_deadline": state.upload_deadline, "voting_ended": state.voting_ended}
 
 
 def save_config(config: dict) -> None:
-    """Write config dictionary to config file."""
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f)
+    """Write config dictionary to config file (atomically)."""
+    contest_state.save(
+        CONFIG_FILE,
+        contest_state.ContestState(
+            upload_deadline=config.get("upload_deadline"),
+            voting_ended=bool(config.get("voting_ended", False)),
+        ),
+    )
 
 
 def get_upload_deadline() -> str | None:
     """Get upload deadline date from config file."""
-    return get_config().get("upload_deadline")
+    return get_contest_state().upload_deadline
 
 
 def set_upload_deadline(deadline: str | None) -> None:
@@ -608,75 +743,94 @@ def set_upload_deadline(deadline: str | None) -> None:
 
 def is_upload_deadline_passed() -> bool:
     """Check if current date has passed the upload deadline."""
-    deadline = get_upload_deadline()
-    if not deadline:
-        return False  # No deadline set, uploads allowed
-    
-    try:
-        deadline_date = datetime.strptime(deadline, "%Y-%m-%d").date()
-        today = date.today()
-        return today > deadline_date
-    except (ValueError, TypeError):
-        return False
+    return get_contest_state().upload_deadline_passed
 
 
 def get_countdown_timer() -> str:
     """Calculate and return countdown timer string until upload deadline."""
-    deadline = get_upload_deadline()
-    if not deadline:
-        return "No deadline set"
-    
-    try:
-        deadline_date = datetime.strptime(deadline, "%Y-%m-%d").date()
-        today = date.today()
-        
-        if today > deadline_date:
-            return "Upload deadline has passed"
-        elif today == deadline_date:
-            return "⏰ Upload deadline is today!"
-        else:
-            days_left = (deadline_date - today).days
-            return f"⏰ {days_left} day(s) remaining to upload"
-    except (ValueError, TypeError):
-        return "Invalid deadline format"
+    return get_contest_state().countdown
 
 
 def get_voting_ended() -> bool:
     """Check if voting has ended."""
-    return get_config()["voting_ended"]
+    return get_contest_state().voting_ended
 
 
 def set_voting_ended(ended: bool) -> None:
-    """Set voting ended status in config file."""
+    """Set voting ended status in config file; ending takes the results snapshot, reopening archives it."""
+    if not ended:
+        results_snapshot.archive(RESULTS_FILE)
     config = get_config()
     config["voting_ended"] = ended
-    save_config(config)
+    # No vote can be between save_rating's phase check and its append while the phase flips
+    with get_vote_journal().appends_paused():
+        save_config(config)
+    # Taken after the phase flips: every vote accepted before it is already in the journal
+    # and no later one is accepted
+    if ended:
+        publish_results()
 
 
-def compute_leaderboard(show_uploader: bool = False) -> pd.DataFrame:
-    """Compute leaderboard. Show uploader names only if show_uploader=True. Only includes approved photos."""
-    photos_df, ratings_df = load_data()
+def rank_approved_photos() -> pd.DataFrame:
+    """Approved photos in leaderboard order with rank and votes columns added."""
+    photos_df = load_photos()
     
-    # Filter to only approved photos (handle NaN/empty values)
-    photos_df["status"] = photos_df["status"].fillna("approved")
-    approved_df = photos_df[photos_df["status"].astype(str).str.lower() == "approved"].copy()
+    # Filter to only approved photos (statuses are normalized when written)
+    approved_df = photos_df[photos_df["status"] == "approved"]
     
     if approved_df.empty:
-        columns = ["rank", "title", "uploader", "votes"] if show_uploader else ["rank", "title", "votes"]
-        return pd.DataFrame(columns=columns)
-
-    agg = ratings_df.groupby("photo_id")["rating"].count().rename("votes")
-    merged = approved_df.merge(agg, left_on="photo_id", right_index=True, how="left")
-    merged["votes"] = merged["votes"].fillna(0).astype(int)
-    merged = merged.sort_values(by=["votes", "uploaded_at"], ascending=[False, True]).reset_index(drop=True)
+        return approved_df.assign(rank=0, votes=0)
+
+    # Vote counters are kept up to date as votes are cast, so no pass over the ratings is needed.
+    # Ties go to the earlier upload (missing timestamps last).
+    tiebreaks = dict(zip(approved_df["photo_id"], approved_df["uploaded_at"].fillna("\uffff").astype(str)))
+    ranked = [(photo_id, votes) for photo_id, votes in get_vote_journal().ranked_photos(tiebreaks) if photo_id in tiebreaks]
+    merged = approved_df.set_index("photo_id").loc[[photo_id for photo_id, _ in ranked]].reset_index()
+    merged["votes"] = [votes for _, votes in ranked]
     merged.insert(0, "rank", range(1, len(merged) + 1))
-    
+    return merged
+
+
+def compute_leaderboard(show_uploader: bool = False) -> pd.DataFrame:
+    """Compute leaderboard. Show uploader names only if show_uploader=True. Only includes approved photos."""
+    merged = rank_approved_photos()
     if show_uploader:
         return merged[["rank", "title", "uploader", "votes"]]
     else:
         return merged[["rank", "title", "votes"]]
 
 
+def _results_rows() -> list[dict]:
+    ranked = rank_approved_photos()
+    users = get_user_directory().lookup(ranked["uploader"].dropna().unique())
+    return [
+        {
+            "photo_id": row["photo_id"],
+            "title": row["title"] if pd.notna(row["title"]) else "",
+            "theme": row["theme"] if pd.notna(row["theme"]) else None,
+            "uploader": row["uploader"] if pd.notna(row["uploader"]) else "",
+            "uploader_name": (users.get(row["uploader"]) or {}).get("name"),
+            "votes": row["votes"],
+        }
+        for row in ranked.to_dict("records")
+    ]
+
+
+def publish_results() -> results_snapshot.ResultsSnapshot:
+    """Compute the final standings once and write them as a new results snapshot version."""
+    return results_snapshot.write(RESULTS_FILE, _results_rows())
+
+
+def get_results() -> results_snapshot.ResultsSnapshot:
+    """The results snapshot served in the results phase (taken now if voting ended without one)."""
+    return results_snapshot.load_or_write(RESULTS_FILE, _results_rows)
+
+
+def verify_vote_tallies() -> dict[str, tuple[int, int]]:
+    """Recompute vote counts from scratch and return photos whose live counter drifted."""
+    return get_vote_journal().verify_tallies()
+
+
 def require_user() -> dict:
     """Handle user authentication (simplified login) and return user info dict."""
     if "authenticated_user" not in st.session_state:
@@ -696,7 +850,11 @@ def require_user() -> dict:
         login_posting = st.sidebar.text_input("Posting Details", key="login_posting")
         
         if st.sidebar.button("Login", key="login_btn"):
-            if login_name and login_employee_id and login_posting:
+            if not (login_name and login_employee_id.strip() and login_posting):
+                st.sidebar.warning("Please fill all fields.")
+            elif not is_valid_employee_id(login_employee_id):
+                st.sidebar.error(f"Employee ID is too long (at most {vote_journal.MAX_ID_BYTES} characters).")
+            else:
                 success, user_info = login_or_create_user(login_employee_id, login_name, login_posting)
                 if success:
                     st.session_state.authenticated_user = user_info
@@ -704,8 +862,6 @@ def require_user() -> dict:
                     st.rerun()
                 else:
                     st.sidebar.error("Login failed. Please try again.")
-            else:
-                st.sidebar.warning("Please fill all fields.")
     
     with tab2:
         st.sidebar.header("Admin Login")
@@ -727,12 +883,12 @@ def require_user() -> dict:
     return {}
 
 
-def upload_deadline_setter(employee_id: str) -> None:
+def upload_deadline_setter(employee_id: str, state: contest_state.ContestState) -> None:
     """Display upload deadline setting in sidebar. Only admin can set deadline."""
     st.sidebar.divider()
     st.sidebar.header("Contest Control")
     
-    voting_ended = get_voting_ended()
+    voting_ended = state.voting_ended
     is_admin = employee_id.upper() == ADMIN_USERNAME.upper() if employee_id else False
     
     if voting_ended:
@@ -741,13 +897,13 @@ def upload_deadline_setter(employee_id: str) -> None:
         st.sidebar.markdown("**Status:** 📸 Active Contest Phase")
     
     # Show countdown timer
-    countdown = get_countdown_timer()
+    countdown = state.countdown
     st.sidebar.markdown(f"**{countdown}**")
     
     # Admin can set upload deadline
     if is_admin and not voting_ended:
         st.sidebar.subheader("Set Upload Deadline")
-        current_deadline = get_upload_deadline()
+        current_deadline = state.upload_deadline
         
         if current_deadline:
             try:
@@ -774,7 +930,7 @@ def upload_deadline_setter(employee_id: str) -> None:
                 st.sidebar.success("Upload deadline removed")
                 st.rerun()
     elif not is_admin and not voting_ended:
-        deadline = get_upload_deadline()
+        deadline = state.upload_deadline
         if deadline:
             try:
                 deadline_date = datetime.strptime(deadline, "%Y-%m-%d").date()
@@ -783,9 +939,9 @@ def upload_deadline_setter(employee_id: str) -> None:
                 pass
 
 
-def end_voting_button(employee_id: str) -> None:
+def end_voting_button(employee_id: str, state: contest_state.ContestState) -> None:
     """Display 'End Voting' button only for admin user."""
-    voting_ended = get_voting_ended()
+    voting_ended = state.voting_ended
     
     # Show button if voting hasn't ended
     if not voting_ended:
@@ -804,9 +960,9 @@ def end_voting_button(employee_id: str) -> None:
             st.sidebar.info(f"⚠️ Admin access required. Login as '{ADMIN_USERNAME}' to end voting.")
 
 
-def reset_contest_button(employee_id: str) -> None:
+def reset_contest_button(employee_id: str, state: contest_state.ContestState) -> None:
     """Display 'Reset Contest' button for admin to reset contest (for testing)."""
-    voting_ended = get_voting_ended()
+    voting_ended = state.voting_ended
     is_admin = employee_id.upper() == ADMIN_USERNAME.upper()
     
     # Only show reset button if voting has ended and user is admin
@@ -814,22 +970,88 @@ def reset_contest_button(employee_id: str) -> None:
         st.sidebar.divider()
         st.sidebar.header("Admin Controls")
         if st.sidebar.button("🔄 Reset Contest (Back to Active Phase)", type="secondary", use_container_width=True):
-            config = get_config()
-            config["voting_ended"] = False
-            save_config(config)
-            st.sidebar.success("Contest reset! Back to Active Contest Phase.")
+            set_voting_ended(False)
+            st.sidebar.success("Contest reset! Back to Active Contest Phase. The results snapshot was archived.")
             st.rerun()
 
 
+def _clear_moderation_selection(photo_ids: list[str]) -> None:
+    for photo_id in photo_ids:
+        st.session_state.pop(f"select-{photo_id}", None)
+
+
+def rerun_fragment() -> None:
+    """Rerun only the calling fragment, or the whole script when the click was handled by a full run."""
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+
+@st.fragment
+@perf.timed("fragment.moderation_card")
+def moderation_card(row: pd.Series, photo_image, uploaded_by: str | None = None, rejected: bool = False) -> None:
+    """One photo under review with its Approve/Reject buttons.
+
+    A fragment: a decision reruns only this card, which then shows the outcome
+    in place of the buttons. The section counts catch up on the next full rerun.
+    """
+    photo_id = row["photo_id"]
+    outcome = st.session_state.moderated_photos.get(photo_id)
+    border = "2px solid #ef4444; opacity: 0.7" if rejected else "2px solid #f59e0b"
+    st.markdown(f'<div class="photo-card" style="border: {border};">', unsafe_allow_html=True)
+    if photo_image:
+        st.image(photo_image, caption=None)
+    else:
+        st.warning("Image file missing.")
+    
+    st.markdown(f'<div class="photo-title">{row["title"]}</div>', unsafe_allow_html=True)
+    st.caption(f"Theme: {row['theme'] if pd.notna(row['theme']) else 'Unspecified'}")
+    if outcome == "approved":
+        st.success(f"Photo '{row['title']}' approved!")
+    elif outcome == "rejected":
+        st.info(f"Photo '{row['title']}' rejected.")
+    elif rejected:
+        st.caption(f"Status: ❌ Rejected")
+        if st.button("✅ Approve", key=f"approve-rejected-{photo_id}", use_container_width=True):
+            approve_photo(photo_id)
+            st.session_state.moderated_photos[photo_id] = "approved"
+            rerun_fragment()
+    else:
+        if row.get("storage_state") == "processing":
+            st.caption("☁️ Uploading to cloud storage...")
+        if uploaded_by:
+            st.caption(uploaded_by)
+        
+        col_approve, col_reject = st.columns(2)
+        with col_approve:
+            if st.button("✅ Approve", key=f"approve-{photo_id}", use_container_width=True, type="primary"):
+                approve_photo(photo_id)
+                st.session_state.moderated_photos[photo_id] = "approved"
+                rerun_fragment()
+        
+        with col_reject:
+            if st.button("❌ Reject", key=f"reject-{photo_id}", use_container_width=True):
+                reject_photo(photo_id, "Rejected by admin")
+                st.session_state.moderated_photos[photo_id] = "rejected"
+                rerun_fragment()
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+
+@perf.timed("section.moderation")
 def moderation_section(employee_id: str) -> None:
     """Admin-only section to review and approve/reject pending photos."""
+    # A full rerun reloads every status, so decisions shown in-card by moderation_card are no longer needed
+    st.session_state.moderated_photos = {}
     photos_df, _ = load_data()
     
-    # Get pending photos
-    pending_df = photos_df[photos_df["status"] == "pending"].copy()
-    rejected_df = photos_df[photos_df["status"] == "rejected"].copy()
-    pending_df["theme"] = pending_df.get("theme", "Unspecified").fillna("Unspecified")
-    rejected_df["theme"] = rejected_df.get("theme", "Unspecified").fillna("Unspecified")
+    # Get pending photos (photos without a theme fall into "Other / Unspecified")
+    pending_df = photos_df[photos_df["status"] == "pending"]
+    rejected_df = photos_df[photos_df["status"] == "rejected"]
+    
+    # One batched lookup for every pending uploader instead of a users scan per card
+    uploaders = get_user_directory().lookup(pending_df["uploader"].dropna())
     
     st.markdown('<div class="section-title">📋 Photo Moderation</div>', unsafe_allow_html=True)
     st.markdown('<div class="section-note">Review and approve/reject uploaded photos. Only approved photos are visible to other users.</div>', unsafe_allow_html=True)
@@ -839,6 +1061,7 @@ def moderation_section(employee_id: str) -> None:
         st.success("✅ No pending photos. All photos have been reviewed.")
     else:
         st.subheader(f"⏳ Pending Review ({len(pending_df)} photo(s))")
+        selection_mode = st.toggle("Selection mode (approve or reject several photos at once)", key="moderation_selection_mode")
         theme_groups = THEMES + ["Other/Unspecified"]
         for theme in theme_groups:
             if theme == "Other/Unspecified":
@@ -851,10 +1074,37 @@ def moderation_section(employee_id: str) -> None:
                 continue
             
             st.markdown(f"**Theme: {display_name} ({len(theme_df)} pending)**")
+            
+            # Bulk actions: every selected photo (or the whole theme) is updated in one write
+            if selection_mode:
+                theme_ids = theme_df["photo_id"].tolist()
+                selected = [pid for pid in theme_ids if st.session_state.get(f"select-{pid}")]
+                col_sel_approve, col_sel_reject, col_all = st.columns(3)
+                with col_sel_approve:
+                    if st.button(f"✅ Approve selected ({len(selected)})", key=f"approve-selected-{theme}", use_container_width=True, disabled=not selected):
+                        updated = bulk_set_photo_status(selected, "approved")
+                        _clear_moderation_selection(selected)
+                        st.success(f"{updated} photo(s) approved!")
+                        st.rerun()
+                with col_sel_reject:
+                    if st.button(f"❌ Reject selected ({len(selected)})", key=f"reject-selected-{theme}", use_container_width=True, disabled=not selected):
+                        updated = bulk_set_photo_status(selected, "rejected", "Rejected by admin")
+                        _clear_moderation_selection(selected)
+                        st.info(f"{updated} photo(s) rejected.")
+                        st.rerun()
+                with col_all:
+                    if st.button(f"✅ Approve all in theme ({len(theme_ids)})", key=f"approve-theme-{theme}", use_container_width=True):
+                        updated = bulk_set_photo_status(theme_ids, "approved")
+                        _clear_moderation_selection(theme_ids)
+                        st.success(f"{updated} photo(s) approved!")
+                        st.rerun()
+            
             cols_per_row = 2
             pending_rows = [
                 theme_df.iloc[i : i + cols_per_row] for i in range(0, len(theme_df), cols_per_row)
             ]
+            # Fetch every image of this group at once, in grid order
+            images = iter(get_photos_sources(theme_df, renditions.pick(CARD_SLOT_PX)))
             
             for row_df in pending_rows:
                 # Only create columns for actual photos to avoid empty containers
@@ -864,38 +1114,17 @@ def moderation_section(employee_id: str) -> None:
                     photo_id = row["photo_id"]
                     
                     with col:
-                        st.markdown('<div class="photo-card" style="border: 2px solid #f59e0b;">', unsafe_allow_html=True)
-                        photo_image = get_photo_image(row)
-                        if photo_image:
-                            st.image(photo_image, caption=None)
-                        else:
-                            st.warning("Image file missing.")
-                        
-                        st.markdown(f'<div class="photo-title">{row["title"]}</div>', unsafe_allow_html=True)
-                        st.caption(f"Theme: {row.get('theme', 'Unspecified')}")
-                        
                         # Show uploader info for admin
                         uploader_id = row.get("uploader", "Unknown")
-                        users_df = load_users()
-                        uploader_info = users_df[users_df["employee_id"].astype(str).str.upper() == uploader_id.upper()]
-                        if not uploader_info.empty:
-                            uploader_name = uploader_info.iloc[0].get("name", "Unknown")
-                            st.caption(f"Uploaded by: {uploader_name} ({uploader_id})")
-                        
-                        col_approve, col_reject = st.columns(2)
-                        with col_approve:
-                            if st.button("✅ Approve", key=f"approve-{photo_id}", use_container_width=True, type="primary"):
-                                approve_photo(photo_id)
-                                st.success(f"Photo '{row['title']}' approved!")
-                                st.rerun()
-                        
-                        with col_reject:
-                            if st.button("❌ Reject", key=f"reject-{photo_id}", use_container_width=True):
-                                reject_photo(photo_id, "Rejected by admin")
-                                st.info(f"Photo '{row['title']}' rejected.")
-                                st.rerun()
-                        
-                        st.markdown("</div>", unsafe_allow_html=True)
+                        uploader_info = uploaders.get(user_directory.normalize(uploader_id))
+                        uploaded_by = None
+                        if uploader_info is not None:
+                            uploader_name = uploader_info.get("name") or "Unknown"
+                            uploaded_by = f"Uploaded by: {uploader_name} ({uploader_id})"
+                        moderation_card(row, next(images), uploaded_by)
+                        # Outside the card fragment: ticking a box reruns the page so the bulk counts stay right
+                        if selection_mode:
+                            st.checkbox("Select", key=f"select-{photo_id}")
     
     # Show rejected photos (optional - admin can see what was rejected)
     if not rejected_df.empty:
@@ -916,35 +1145,19 @@ def moderation_section(employee_id: str) -> None:
                 rejected_rows = [
                     theme_df.iloc[i : i + cols_per_row] for i in range(0, len(theme_df), cols_per_row)
                 ]
+                images = iter(get_photos_sources(theme_df, renditions.pick(CARD_SLOT_PX)))
                 
                 for row_df in rejected_rows:
                     # Only create columns for actual photos to avoid empty containers
                     num_photos = len(row_df)
                     cols = st.columns(num_photos)
                     for idx, (col, (_, row)) in enumerate(zip(cols, row_df.iterrows())):
-                        photo_id = row["photo_id"]
-                        
                         with col:
-                            st.markdown('<div class="photo-card" style="border: 2px solid #ef4444; opacity: 0.7;">', unsafe_allow_html=True)
-                            photo_image = get_photo_image(row)
-                            if photo_image:
-                                st.image(photo_image, caption=None)
-                            else:
-                                st.warning("Image file missing.")
-                            
-                            st.markdown(f'<div class="photo-title">{row["title"]}</div>', unsafe_allow_html=True)
-                            st.caption(f"Theme: {row.get('theme', 'Unspecified')}")
-                            st.caption(f"Status: ❌ Rejected")
-                            
-                            if st.button("✅ Approve", key=f"approve-rejected-{photo_id}", use_container_width=True):
-                                approve_photo(photo_id)
-                                st.success(f"Photo '{row['title']}' approved!")
-                                st.rerun()
-                            
-                            st.markdown("</div>", unsafe_allow_html=True)
-
-
-def upload_section(employee_id: str) -> None:
+                            moderation_card(row, next(images), rejected=True)
+
+
+@perf.timed("section.upload")
+def upload_section(employee_id: str, state: contest_state.ContestState) -> None:
     """Upload section - shown during Active Contest Phase, disabled after upload deadline. Admin cannot upload."""
     # Admin cannot upload photos - they must login as regular user
     is_admin = employee_id.upper() == ADMIN_USERNAME.upper() if employee_id else False
@@ -955,11 +1168,11 @@ def upload_section(employee_id: str) -> None:
     st.markdown('<div class="section-title">Upload a Photo</div>', unsafe_allow_html=True)
     
     # Check if upload deadline has passed
-    deadline_passed = is_upload_deadline_passed()
-    countdown = get_countdown_timer()
+    deadline_passed = state.upload_deadline_passed
+    countdown = state.countdown
     
     if deadline_passed:
-        deadline = get_upload_deadline()
+        deadline = state.upload_deadline
         try:
             deadline_date = datetime.strptime(deadline, "%Y-%m-%d").date()
             deadline_str = deadline_date.strftime("%B %d, %Y")
@@ -971,7 +1184,7 @@ def upload_section(employee_id: str) -> None:
     
     # Show user's own photos with status
     photos_df, _ = load_data()
-    user_photos = photos_df[photos_df["uploader"].astype(str).str.upper() == employee_id.upper()].copy()
+    user_photos = photos_df[photos_df["uploader"] == employee_id.upper()]
     
     if not user_photos.empty:
         st.markdown("### Your Uploaded Photos")
@@ -979,13 +1192,14 @@ def upload_section(employee_id: str) -> None:
         user_photo_rows = [
             user_photos.iloc[i : i + cols_per_row] for i in range(0, len(user_photos), cols_per_row)
         ]
+        images = iter(get_photos_sources(user_photos, renditions.pick(GRID_SLOT_PX)))
         
         for row_df in user_photo_rows:
             cols = st.columns(len(row_df))
             for col, (_, row) in zip(cols, row_df.iterrows()):
                 with col:
                     st.markdown('<div class="photo-card">', unsafe_allow_html=True)
-                    photo_image = get_photo_image(row)
+                    photo_image = next(images)
                     if photo_image:
                         st.image(photo_image, caption=None, use_container_width=True)
                     st.markdown(f'<div class="photo-title">{row["title"]}</div>', unsafe_allow_html=True)
@@ -1052,7 +1266,7 @@ def upload_section(employee_id: str) -> None:
             return
         
         # Enforce one photo per theme (pending/approved count; rejected can be replaced)
-        user_photos = photos_df[photos_df["uploader"].astype(str).str.upper() == employee_id.upper()].copy()
+        user_photos = photos_df[photos_df["uploader"] == employee_id.upper()]
         non_rejected = user_photos[user_photos["status"] != "rejected"] if "status" in user_photos.columns else user_photos
         if len(non_rejected) >= MAX_PHOTOS_PER_USER:
             st.error(f"You have reached the maximum upload limit of {MAX_PHOTOS_PER_USER} photos.")
@@ -1062,7 +1276,11 @@ def upload_section(employee_id: str) -> None:
             st.error("You have already uploaded a photo for this theme. Each user can submit one photo per theme (max 2 total).")
             return
         
-        save_photo(uploaded_file, title, employee_id, theme)
+        try:
+            save_photo(uploaded_file, title, employee_id, theme)
+        except ingest.IngestError as e:
+            st.error(str(e))
+            return
         st.success(f"Photo '{title.strip()}' uploaded successfully! ⏳ It is pending admin approval and will be visible to others once approved.")
         # Clear the form after successful upload
         if title_key in st.session_state:
@@ -1074,22 +1292,21 @@ def upload_section(employee_id: str) -> None:
         st.rerun()
 
 
+@perf.timed("section.rejected_photos")
 def rejected_photos_section(employee_id: str) -> None:
     """Show rejected photos - visible only to uploader and admin."""
     photos_df, _ = load_data()
     is_admin = employee_id.upper() == ADMIN_USERNAME.upper() if employee_id else False
     
     # Filter rejected photos
-    photos_df["status"] = photos_df["status"].fillna("approved")
     if is_admin:
         # Admin sees all rejected photos
-        rejected_df = photos_df[photos_df["status"].astype(str).str.lower() == "rejected"].copy()
+        rejected_df = photos_df[photos_df["status"] == "rejected"]
     else:
         # Regular users see only their own rejected photos
         rejected_df = photos_df[
-            (photos_df["status"].astype(str).str.lower() == "rejected") &
-            (photos_df["uploader"].astype(str).str.upper() == employee_id.upper())
-        ].copy()
+            (photos_df["status"] == "rejected") & (photos_df["uploader"] == employee_id.upper())
+        ]
     
     if rejected_df.empty:
         return  # Don't show section if no rejected photos
@@ -1105,6 +1322,7 @@ def rejected_photos_section(employee_id: str) -> None:
     photo_rows = [
         rejected_df.iloc[i : i + cols_per_row] for i in range(0, len(rejected_df), cols_per_row)
     ]
+    images = iter(get_photos_sources(rejected_df, renditions.pick(GRID_SLOT_PX)))
     
     for row_df in photo_rows:
         cols = st.columns(len(row_df))
@@ -1113,7 +1331,7 @@ def rejected_photos_section(employee_id: str) -> None:
             
             with col:
                 st.markdown('<div class="photo-card" style="border: 2px solid #ef4444; opacity: 0.8;">', unsafe_allow_html=True)
-                photo_image = get_photo_image(row)
+                photo_image = next(images)
                 if photo_image:
                     st.image(photo_image, caption=None)
                 else:
@@ -1143,15 +1361,44 @@ def rejected_photos_section(employee_id: str) -> None:
                 st.markdown("</div>", unsafe_allow_html=True)
 
 
+def gallery_page(photos_df: pd.DataFrame, theme: str | None, page: int, page_size: int) -> tuple[pd.DataFrame, int, int]:
+    """One page of photos, optionally limited to a theme.
+
+    Returns (page_df, page, page_count) with page clamped into range, so a cursor
+    left past the end (after deletions or a filter change) lands on the last page.
+    """
+    if theme:
+        photos_df = photos_df[photos_df["theme"] == theme]
+    page_count = max(1, -(-len(photos_df) // page_size))
+    page = min(max(page, 0), page_count - 1)
+    return photos_df.iloc[page * page_size : (page + 1) * page_size], page, page_count
+
+
+def _reset_gallery_page() -> None:
+    st.session_state.gallery_page = 0
+
+
+@perf.timed("section.rating")
 def rating_section(employee_id: str) -> None:
-    """Voting section - shows approved photos with voting buttons."""
+    """Voting section - shows approved photos with voting buttons, one page at a time."""
     st.markdown('<div class="section-title">Approved Photos - Vote Here</div>', unsafe_allow_html=True)
-    photos_df, ratings_df = load_data()
+    vote_gallery(employee_id)
+
+
+@st.fragment
+@perf.timed("fragment.vote_gallery")
+def vote_gallery(employee_id: str) -> None:
+    """Current vote, theme filter, one page of cards and the pager.
+
+    A fragment: voting, moving a vote, deleting and paging rerun only this block
+    (one page of cards), not the whole script. The cards stay together because a
+    vote move changes two of them and the pinned "Your vote" card.
+    """
+    photos_df = load_photos()
     is_admin = employee_id.upper() == ADMIN_USERNAME.upper()
 
-    # Filter to show only approved photos (handle NaN/empty values)
-    photos_df["status"] = photos_df["status"].fillna("approved")
-    approved_df = photos_df[photos_df["status"].astype(str).str.lower() == "approved"].copy()
+    # Filter to show only approved photos
+    approved_df = photos_df[photos_df["status"] == "approved"]
     
     if approved_df.empty:
         st.info("No approved photos available for voting.")
@@ -1169,14 +1416,50 @@ def rating_section(employee_id: str) -> None:
         )
 
     # Determine current vote for this user (if any)
-    user_vote = ratings_df[ratings_df["user_id"] == employee_id]
-    current_photo_id = user_vote["photo_id"].iloc[0] if not user_vote.empty else None
+    current_photo_id = get_vote_journal().user_vote(employee_id)
+    current_df = approved_df[approved_df["photo_id"] == current_photo_id] if current_photo_id else approved_df.iloc[:0]
+
+    # Keep the current vote visible whichever page or theme is being browsed
+    if not current_df.empty:
+        row = current_df.iloc[0]
+        st.markdown("**Your vote**")
+        col, _ = st.columns([1, 2])
+        with col:
+            st.markdown('<div class="photo-card">', unsafe_allow_html=True)
+            photo_image = get_photos_sources(current_df, renditions.pick(GRID_SLOT_PX))[0]
+            if photo_image:
+                st.image(photo_image, caption=None)
+            else:
+                st.warning("Image file missing.")
+            st.markdown(f'<div class="photo-title">{row["title"]}</div>', unsafe_allow_html=True)
+            st.caption(f"Theme: {row.get('theme', 'Unspecified')}")
+            st.markdown("</div>", unsafe_allow_html=True)
+
+    # Theme filter and page cursor; changing the filter starts again from the first page
+    if "gallery_page" not in st.session_state:
+        st.session_state.gallery_page = 0
+    theme_filter = st.selectbox(
+        "Show theme", ["All themes"] + THEMES, key="gallery_theme", on_change=_reset_gallery_page
+    )
+    page_df, page, page_count = gallery_page(
+        approved_df,
+        None if theme_filter == "All themes" else theme_filter,
+        st.session_state.gallery_page,
+        GALLERY_PAGE_SIZE,
+    )
+    st.session_state.gallery_page = page
+
+    if page_df.empty:
+        st.info("No approved photos for this theme yet.")
+        return
 
     # Display in a simple grid (3 columns per row)
     cols_per_row = 3
     photo_rows = [
-        approved_df.iloc[i : i + cols_per_row] for i in range(0, len(approved_df), cols_per_row)
+        page_df.iloc[i : i + cols_per_row] for i in range(0, len(page_df), cols_per_row)
     ]
+    # Resolve only this page's images, concurrently, so a rerun costs one page rather than the whole contest
+    images = iter(get_photos_sources(page_df, renditions.pick(GRID_SLOT_PX)))
 
     for row_df in photo_rows:
         cols = st.columns(len(row_df))
@@ -1185,7 +1468,7 @@ def rating_section(employee_id: str) -> None:
 
             with col:
                 st.markdown('<div class="photo-card">', unsafe_allow_html=True)
-                photo_image = get_photo_image(row)
+                photo_image = next(images)
                 if photo_image:
                     st.image(photo_image, caption=None)
                 else:
@@ -1199,9 +1482,14 @@ def rating_section(employee_id: str) -> None:
                 disabled = is_current
 
                 if st.button(button_label, key=f"vote-{photo_id}", use_container_width=True, disabled=disabled):
-                    save_rating(photo_id, employee_id, 1)
-                    st.success("Vote recorded." if not current_photo_id else "Vote moved.")
-                    st.rerun()
+                    if save_rating(photo_id, employee_id, 1):
+                        st.success("Vote recorded." if not current_photo_id else "Vote moved.")
+                        rerun_fragment()
+                    elif get_voting_ended():
+                        # A fragment rerun doesn't re-check the phase; the admin ended voting meanwhile
+                        st.warning("Voting has ended, so this vote was not recorded. Reload the page to see the results.")
+                    else:
+                        st.warning("This photo is no longer available.")
 
                 if is_current:
                     st.caption("Your current vote.")
@@ -1211,19 +1499,40 @@ def rating_section(employee_id: str) -> None:
                     if st.button("🗑️ Delete", key=f"delete-vote-{photo_id}", use_container_width=True):
                         delete_photo(photo_id)
                         st.success(f"Photo '{row['title']}' deleted successfully.")
-                        st.rerun()
+                        rerun_fragment()
                 
                 st.markdown("</div>", unsafe_allow_html=True)
 
-
+    if page_count > 1:
+        col_prev, col_page, col_next = st.columns([1, 2, 1])
+        with col_prev:
+            if st.button("← Previous", key="gallery-prev", use_container_width=True, disabled=page == 0):
+                st.session_state.gallery_page = page - 1
+                rerun_fragment()
+        with col_page:
+            st.caption(f"Page {page + 1} of {page_count}")
+        with col_next:
+            if st.button("Next →", key="gallery-next", use_container_width=True, disabled=page >= page_count - 1):
+                st.session_state.gallery_page = page + 1
+                rerun_fragment()
+
+
+@perf.timed("section.leaderboard")
 def leaderboard_section(show_uploader: bool = False) -> None:
-    """Display leaderboard. Show uploader names only if show_uploader=True."""
+    """Display the final leaderboard from the results snapshot. Show uploader names only if show_uploader=True."""
     st.markdown('<div class="section-title">Leaderboard</div>', unsafe_allow_html=True)
-    lb = compute_leaderboard(show_uploader=show_uploader)
+    results = get_results()
+    lb = results.leaderboard(show_uploader=show_uploader)
     if lb.empty:
         st.info("No entries yet.")
         return
-    st.dataframe(lb, hide_index=True, use_container_width=True)
+    st.caption(f"Final results (snapshot v{results.version}, {results.total_votes} votes)")
+    st.dataframe(
+        lb,
+        hide_index=True,
+        use_container_width=True,
+        column_config={"theme_rank": st.column_config.NumberColumn("theme rank")},
+    )
 
 
 def show_rules_modal() -> bool:
@@ -1371,7 +1680,112 @@ def show_rules_modal() -> bool:
     return False
 
 
+def perf_panel() -> None:
+    """Admin-only sidebar panel: record timings and show span percentiles and per-rerun averages."""
+    with st.sidebar.expander("Performance"):
+        cold_start = startup.report()
+        if cold_start["first_rerun_ms"] is not None:
+            steps = ", ".join(f"{name} {ms:.0f} ms" for name, ms in cold_start["steps_ms"].items())
+            process_age = cold_start["process_age_at_first_rerun_ms"]
+            st.caption(
+                f"Cold start: first rerun {cold_start['first_rerun_ms']:.0f} ms"
+                + (f", {process_age / 1000:.1f} s after process start" if process_age is not None else "")
+                + (f" (setup: {steps})" if steps else "")
+            )
+        recording = st.toggle("Record timings", value=perf.recorder() is not None, key="perf_recording")
+        if recording and perf.recorder() is None:
+            perf.enable(PERF_LOG_FILE)
+        elif not recording and perf.recorder() is not None:
+            perf.disable()
+        recorder = perf.recorder()
+        if recorder is None:
+            st.caption("Timing is off.")
+            return
+        summary = recorder.rerun_summary()
+        st.caption(f"Last {summary['reruns']} rerun(s): {summary['rerun_ms']:.0f} ms on average")
+        stats = recorder.stats()
+        if not stats:
+            return
+        rows = [
+            {
+                "span": name,
+                "per rerun ms": round(summary["spans"].get(name, 0.0), 1),
+                "count": span_stats["count"],
+                "p50 ms": round(span_stats["p50_ms"], 1),
+                "p95 ms": round(span_stats["p95_ms"], 1),
+                "p99 ms": round(span_stats["p99_ms"], 1),
+                "MB": round(span_stats["bytes"] / (1024 * 1024), 2),
+            }
+            for name, span_stats in sorted(stats.items())
+        ]
+        st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
+
+def profile_panel() -> None:
+    """Admin-only sidebar panel: arm cProfile + tracemalloc for the next rerun."""
+    with st.sidebar.expander("Profiler"):
+        st.toggle("Profile next rerun", key="profile_next", on_change=_arm_profile)
+        st.caption(f"The next interaction (or a load with ?profile=1) is profiled once; files go to {PROFILES_DIR}.")
+
+
+def _arm_profile() -> None:
+    # The rerun caused by flipping the toggle is not the one the admin wants profiled
+    st.session_state.profile_skip_rerun = True
+
+
+def profile_requested() -> bool:
+    """Consume a one-shot profile request (armed toggle or ?profile=1); only admins can make one."""
+    armed = st.session_state.get("profile_next", False)
+    if st.session_state.pop("profile_skip_rerun", False):
+        armed = False
+    from_query = st.query_params.get("profile") == "1"
+    if from_query:
+        del st.query_params["profile"]
+    if not (armed or from_query):
+        return False
+    # The toggle is reset before it is drawn, so the request fires once
+    st.session_state.profile_next = False
+    user_info = st.session_state.get("authenticated_user") or {}
+    employee_id = user_info.get("employee_id", "")
+    return bool(user_info.get("is_admin", False) or (employee_id and employee_id.upper() == ADMIN_USERNAME.upper()))
+
+
+def profile_report(report: profiling.ProfileReport) -> None:
+    """Show a captured profile: wall time, peak traced memory, top functions and allocation sites."""
+    with st.expander("🔬 Rerun profile", expanded=True):
+        if report.busy:
+            st.warning("Another profile was being captured, so this rerun was not profiled. Try again.")
+            return
+        st.caption(f"{report.wall_ms:.0f} ms wall, {report.peak_mb:.1f} MB peak traced memory")
+        st.caption(f"Saved {report.prof_path} and {report.alloc_path}")
+        st.markdown("**Top functions by cumulative time**")
+        st.dataframe(pd.DataFrame(report.functions), hide_index=True, use_container_width=True)
+        st.markdown("**Top allocation sites**")
+        st.dataframe(pd.DataFrame(report.allocations), hide_index=True, use_container_width=True)
+
+
+@perf.rerun_scope
 def main() -> None:
+    started = time.perf_counter()
+    try:
+        if not profile_requested():
+            render_page()
+        else:
+            with profiling.capture(PROFILES_DIR, top_n=PROFILE_TOP_N) as report:
+                # Kept even if the rerun ends early (st.rerun/st.stop), then shown on the following rerun
+                st.session_state.pending_profile = report
+                render_page()
+        report = st.session_state.pop("pending_profile", None)
+        if report is not None:
+            profile_report(report)
+    finally:
+        # The first rerun that ran initialize() is the process's cold start; written once to STARTUP_REPORT_FILE.
+        # Reruns stopped earlier (the rules prompt) don't count.
+        if startup.done("ensure_structure"):
+            startup.finish_first_rerun(started, STARTUP_REPORT_FILE)
+
+
+def render_page() -> None:
     st.set_page_config(page_title="Coordination Photography League", page_icon="📸", layout="centered")
     inject_css()
     
@@ -1379,7 +1793,7 @@ def main() -> None:
     if not show_rules_modal():
         return  # Stop execution until rules are acknowledged
 
-    ensure_structure()
+    initialize()
 
     # Display main page title (on ALL pages - before and after login)
     st.markdown("""
@@ -1413,30 +1827,41 @@ def main() -> None:
     if CLOUDINARY_AVAILABLE and is_cloudinary_configured():
         st.sidebar.success("✅ Cloudinary Active")
         st.sidebar.caption("Photos stored in cloud (unlimited)")
-        try:
-            init_cloudinary()
-            secrets = st.secrets.get("cloudinary", {})
-            cloud_name = secrets.get("cloud_name", "N/A")
-            st.sidebar.caption(f"Cloud: {cloud_name}")
-        except:
-            pass
+        st.sidebar.caption(f"Cloud: {cloudinary_settings().get('cloud_name', 'N/A')}")
     else:
         st.sidebar.warning("⚠️ Cloudinary Not Configured")
-        st.sidebar.caption("Using base64 storage (~10-20 photos max)")
+        st.sidebar.caption("Using local blob storage")
         if not CLOUDINARY_AVAILABLE:
             st.sidebar.caption("Cloudinary package not installed")
         else:
             st.sidebar.caption("Add credentials in Streamlit Secrets")
     
+    # Image cache counters (admin only)
+    if is_admin:
+        cache_stats = get_image_cache().stats()
+        st.sidebar.caption(
+            f"Image cache: {cache_stats['memory_hits']} memory hits, {cache_stats['revalidated']} revalidated, "
+            f"{cache_stats['misses']} misses, {cache_stats['evictions']} evictions "
+            f"({cache_stats['memory_bytes'] / (1024 * 1024):.1f} MB in memory, "
+            f"{cache_stats['disk_bytes'] / (1024 * 1024):.1f} MB on disk)"
+        )
+    
+    # Contest settings are read once per rerun and passed down
+    state = get_contest_state()
+    
+    if is_admin:
+        perf_panel()
+        profile_panel()
+    
     # Set upload deadline (admin only)
-    upload_deadline_setter(employee_id if is_admin else "")
+    upload_deadline_setter(employee_id if is_admin else "", state)
     
     # Show admin controls (End Voting button and Reset Contest button)
     if is_admin:
-        end_voting_button(employee_id)
-        reset_contest_button(employee_id)
+        end_voting_button(employee_id, state)
+        reset_contest_button(employee_id, state)
     
-    voting_ended = get_voting_ended()
+    voting_ended = state.voting_ended
 
     # Show moderation section for admin (always visible, regardless of phase)
     if is_admin:
@@ -1451,8 +1876,8 @@ def main() -> None:
         leaderboard_section(show_uploader=True)
     else:
         # Phase 1: Active Contest Phase - Upload + Voting both enabled
-        deadline_passed = is_upload_deadline_passed()
-        countdown = get_countdown_timer()
+        deadline_passed = state.upload_deadline_passed
+        countdown = state.countdown
         
         if deadline_passed:
             st.info("📊 **Active Contest Phase** - Upload deadline has passed. You can vote for your favorite photos. Results are hidden until voting ends.")
@@ -1463,7 +1888,7 @@ def main() -> None:
         st.divider()
         
         # Show upload section (disabled if deadline passed)
-        upload_section(employee_id)
+        upload_section(employee_id, state)
         st.divider()
         
         # Show rejected photos section (if any)
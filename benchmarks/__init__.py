@@ -0,0 +1,5 @@
+"""Benchmarks for the photo contest app.
+
+They run against synthetic data in a scratch data directory (see generate.py)
+and never touch the real data/ folder.
+"""
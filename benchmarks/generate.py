@@ -0,0 +1,132 @@
+"""Generate a synthetic contest in a scratch data directory.
+
+Usage:
+    python -m benchmarks.generate DATA_DIR [--users N] [--photos M] [--votes K]
+
+The directory is used the way the app uses data/: SQLite database, blob store
+and config.json. Photos get real JPEG originals and renditions, drawn from a
+small pool of distinct images so generating thousands of photos stays fast
+while blob sizes stay realistic.
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+# PHOTO_CONTEST_DATA_DIR must be set before app is imported
+app = None
+
+IMAGE_POOL_SIZE = 8
+IMAGE_SIZE = (2048, 1536)
+
+
+def use_data_dir(data_dir: str):
+    """Point the app at data_dir and return the imported app module."""
+    global app
+    data_dir = os.path.abspath(data_dir)
+    os.environ["PHOTO_CONTEST_DATA_DIR"] = data_dir
+    os.environ["PHOTO_CONTEST_PHOTOS_DIR"] = os.path.join(data_dir, "photos")
+    if app is None:
+        import app as app_module
+
+        app = app_module
+    if app.DATA_DIR != data_dir:
+        raise RuntimeError(f"app already uses {app.DATA_DIR}; run each data directory in its own process")
+    return app
+
+
+def make_image(seed: int, size: tuple[int, int] = IMAGE_SIZE) -> bytes:
+    """A photo-like JPEG: smooth gradients plus noise, so it compresses like a real photo."""
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    width, height = size
+    x = np.linspace(0, 1, width)[None, :, None]
+    y = np.linspace(0, 1, height)[:, None, None]
+    phase = rng.uniform(0, 6.28, size=3)
+    base = 127 + 90 * np.sin(x * rng.uniform(2, 9, 3) + y * rng.uniform(2, 9, 3) + phase)
+    pixels = np.clip(base + rng.normal(0, 12, (height, width, 3)), 0, 255).astype("uint8")
+    buffer = io.BytesIO()
+    Image.fromarray(pixels).save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def generate(data_dir: str, users: int, photos: int, votes: int, seed: int = 0) -> dict:
+    """Fill data_dir with users, photos (mostly approved) and one vote per voting user."""
+    app = use_data_dir(data_dir)
+    from PIL import Image
+
+    rng = random.Random(seed)
+    app.ensure_structure()
+    db = app.get_storage()
+    blobs = app.get_blob_store()
+
+    # Pool of encoded originals and their renditions, stored once in the blob store
+    pool = []
+    for index in range(IMAGE_POOL_SIZE):
+        original = make_image(seed * 1000 + index)
+        keys = {
+            app.renditions.column(name): blobs.put(data)
+            for name, data in app.renditions.render(Image.open(io.BytesIO(original)).convert("RGB")).items()
+        }
+        pool.append((blobs.put(original), keys))
+
+    user_ids = [f"E{index:06d}" for index in range(max(users, votes))]
+    started = datetime(2024, 1, 1)
+    with db.transaction():
+        for employee_id in user_ids:
+            db.upsert_user({"employee_id": employee_id, "name": f"User {employee_id}", "posting_details": "Bench"})
+
+        photo_ids = []
+        for index in range(photos):
+            image_sha256, rendition_keys = pool[index % len(pool)]
+            photo_id = f"photo-{index:06d}"
+            db.insert_photo({
+                "photo_id": photo_id,
+                "title": f"Photo {index}",
+                "filename": None,
+                "uploader": rng.choice(user_ids),
+                "uploaded_at": (started + timedelta(minutes=index)).isoformat(),
+                "cloudinary_url": None,
+                "image_sha256": image_sha256,
+                # Roughly what a contest looks like mid-way: most approved, some waiting
+                "status": rng.choices(["approved", "pending", "rejected"], [85, 10, 5])[0],
+                "rejection_reason": None,
+                "theme": rng.choice(app.THEMES),
+                "storage_state": "local",
+                **rendition_keys,
+            })
+            photo_ids.append(photo_id)
+
+        # Votes go straight into the ratings table (the compacted form of the journal)
+        if photo_ids:
+            for employee_id in user_ids[:votes]:
+                db.upsert_rating(rng.choice(photo_ids), employee_id, 1, check_photo=False)
+
+    return {"data_dir": app.DATA_DIR, "users": len(user_ids), "photos": photos, "votes": votes if photos else 0}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Generate a synthetic photo contest")
+    parser.add_argument("data_dir", help="scratch data directory (created if missing)")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--photos", type=int, default=100)
+    parser.add_argument("--votes", type=int, default=100, help="one vote per user; users are added as needed")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if os.path.exists(os.path.join(args.data_dir, "contest.db")):
+        sys.exit(f"{args.data_dir} already contains a contest; use an empty directory")
+    print(json.dumps(generate(args.data_dir, args.users, args.photos, args.votes, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Concurrent voter load test: throughput, latency and lost/duplicated votes.
+
+Usage:
+    python -m benchmarks.load [--processes 4] [--threads 25] [--voters 400] [--moves 3]
+                              [--photos 100] [--think-ms 0] [--compact-seconds N] [--out FILE]
+
+A contest with --photos photos and no votes is generated in a scratch
+directory. --voters simulated voters are split over --processes worker
+processes, each running them on --threads threads. A voter goes through the
+same entry points as the UI: login_or_create_user, get_user_photo_count, then
+--moves calls to save_rating, each moving the vote to another approved photo.
+Workers finish their setup first and are then started together.
+
+Afterwards the final state is checked against what every voter last chose.
+This is done once live (journal plus snapshot) and once after folding the
+journal into the ratings table. The report has sustained votes/sec, latency
+percentiles per entry point and counts of lost, wrong and duplicated votes.
+The exit status is 1 when any vote was lost or duplicated.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from benchmarks.run import REPO_DIR, generate_scratch
+
+OPERATIONS = ("login_or_create_user", "get_user_photo_count", "save_rating")
+MAX_ERRORS_REPORTED = 5
+
+
+def _percentiles(samples: list[float]) -> dict:
+    if not samples:
+        return {"count": 0}
+    ordered = sorted(samples)
+
+    def at(fraction: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(fraction * len(ordered)))], 3)
+
+    return {"count": len(ordered), "p50_ms": at(0.50), "p95_ms": at(0.95), "p99_ms": at(0.99), "max_ms": round(ordered[-1], 3)}
+
+
+def voter_ids(process_index: int, voters: int) -> list[str]:
+    return [f"LOAD{process_index:03d}{index:05d}" for index in range(voters)]
+
+
+def worker(data_dir: str, process_index: int, voters: int, threads: int, moves: int,
+           think_ms: float, compact_seconds: float | None, seed: int) -> dict:
+    """Run one process's voters (in a child process); waits for "go" on stdin after setup."""
+    from benchmarks.generate import use_data_dir
+
+    app = use_data_dir(data_dir)
+    if compact_seconds is not None:
+        app.VOTE_COMPACT_INTERVAL_SECONDS = compact_seconds
+    app.ensure_structure()
+    photos_df = app.load_photos()
+    approved = photos_df[photos_df["status"] == "approved"]["photo_id"].tolist()
+    app.get_vote_journal()
+
+    latencies = {name: [] for name in OPERATIONS}
+    intended: dict[str, str] = {}
+    errors: list[str] = []
+    lock = threading.Lock()
+
+    def timed(name: str, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        elapsed = (time.perf_counter() - started) * 1000
+        with lock:
+            latencies[name].append(elapsed)
+        return result
+
+    def think(rng: random.Random) -> None:
+        if think_ms:
+            time.sleep(rng.uniform(0, 2 * think_ms) / 1000)
+
+    def session(employee_id: str) -> None:
+        rng = random.Random(f"{seed}-{employee_id}")
+        try:
+            timed("login_or_create_user", app.login_or_create_user, employee_id, f"Voter {employee_id}", "Load test")
+            timed("get_user_photo_count", app.get_user_photo_count, employee_id)
+            current = None
+            for _ in range(moves):
+                think(rng)
+                choices = [photo_id for photo_id in approved if photo_id != current] or approved
+                current = rng.choice(choices)
+                timed("save_rating", app.save_rating, current, employee_id, 1)
+                with lock:
+                    intended[employee_id] = current
+        except Exception:
+            with lock:
+                errors.append(traceback.format_exc(limit=3))
+
+    print("ready", flush=True)
+    sys.stdin.readline()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(session, voter_ids(process_index, voters)))
+    elapsed = time.perf_counter() - started
+    app.get_vote_journal().close()
+    return {
+        "seconds": elapsed,
+        "latencies": latencies,
+        "intended": intended,
+        "errors": len(errors),
+        "error_samples": errors[:MAX_ERRORS_REPORTED],
+    }
+
+
+def _compare(intended: dict[str, str], votes: dict[str, str]) -> dict:
+    """lost: voters with no vote at all; wrong_photo: the vote is not the one they cast last."""
+    lost = sum(1 for user_id in intended if user_id not in votes)
+    wrong = sum(1 for user_id, photo_id in intended.items() if user_id in votes and votes[user_id] != photo_id)
+    return {"lost": lost, "wrong_photo": wrong}
+
+
+def verify(data_dir: str, intended: dict[str, str]) -> dict:
+    """Compare the stored contest with the intended final votes (run in a fresh process)."""
+    from benchmarks.generate import use_data_dir
+
+    app = use_data_dir(data_dir)
+    journal = app.get_vote_journal()
+    live = {user_id: photo_id for user_id, (photo_id, _) in journal.votes().items()}
+    counted = sum(journal.vote_counts().values())
+    drift = journal.verify_tallies()
+    users = set(app.load_users()["employee_id"])
+
+    journal.compact()
+    ratings = app.get_storage().ratings_frame()
+    folded = dict(zip(ratings["user_id"], ratings["photo_id"]))
+    journal.close()
+    return {
+        "voters": len(intended),
+        "live": _compare(intended, live),
+        "folded": _compare(intended, folded),
+        # One user counts once; anything above that is a vote counted twice
+        "duplicated": max(0, counted - len(live)),
+        "unexpected_votes": sum(1 for user_id in live if user_id not in intended),
+        "tally_drift": len(drift),
+        "users_missing": sum(1 for user_id in intended if user_id not in users),
+    }
+
+
+def _worker_command(data_dir: str, process_index: int, voters: int, args) -> list[str]:
+    command = [
+        sys.executable, "-m", "benchmarks.load", "--worker", data_dir,
+        "--process-index", str(process_index), "--worker-voters", str(voters),
+        "--threads", str(args.threads), "--moves", str(args.moves),
+        "--think-ms", str(args.think_ms), "--seed", str(args.seed),
+    ]
+    if args.compact_seconds is not None:
+        command += ["--compact-seconds", str(args.compact_seconds)]
+    return command
+
+
+def run(args) -> dict:
+    print(f"generating photos={args.photos}", file=sys.stderr)
+    data_dir = generate_scratch(args.photos, 0, users=1)
+    try:
+        shares = [args.voters // args.processes + (1 if index < args.voters % args.processes else 0)
+                  for index in range(args.processes)]
+        workers = [
+            subprocess.Popen(_worker_command(data_dir, index, share, args), cwd=REPO_DIR,
+                             stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+            for index, share in enumerate(shares)
+        ]
+        for process in workers:
+            if process.stdout.readline().strip() != "ready":
+                raise RuntimeError("a load worker failed during setup")
+        print(f"running {args.voters} voters on {args.processes} process(es) x {args.threads} thread(s)",
+              file=sys.stderr)
+        for process in workers:
+            process.stdin.write("go\n")
+            process.stdin.flush()
+        outputs = []
+        for process in workers:
+            stdout, _ = process.communicate()
+            if process.returncode:
+                raise RuntimeError(f"a load worker exited with status {process.returncode}")
+            outputs.append(json.loads(stdout))
+        # Time spent voting by the slowest process; process shutdown (journal flush) is not counted
+        seconds = max(output["seconds"] for output in outputs)
+
+        intended = {}
+        latencies = {name: [] for name in OPERATIONS}
+        for output in outputs:
+            intended.update(output["intended"])
+            for name, samples in output["latencies"].items():
+                latencies[name].extend(samples)
+        votes_cast = len(latencies["save_rating"])
+
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.load", "--verify", data_dir],
+            cwd=REPO_DIR, check=True, capture_output=True, text=True, input=json.dumps(intended),
+        )
+        integrity = json.loads(completed.stdout)
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "processes": args.processes,
+            "threads": args.threads,
+            "voters": args.voters,
+            "moves": args.moves,
+            "photos": args.photos,
+            "think_ms": args.think_ms,
+        },
+        "throughput": {
+            "votes": votes_cast,
+            "seconds": round(seconds, 3),
+            "votes_per_sec": round(votes_cast / seconds, 1) if seconds else None,
+        },
+        "latency": {name: _percentiles(samples) for name, samples in latencies.items()},
+        "errors": sum(output["errors"] for output in outputs),
+        "error_samples": [sample for output in outputs for sample in output["error_samples"]][:MAX_ERRORS_REPORTED],
+        "integrity": integrity,
+    }
+
+
+def failed(result: dict) -> bool:
+    integrity = result["integrity"]
+    return bool(
+        result["errors"]
+        or integrity["duplicated"]
+        or integrity["tally_drift"]
+        or integrity["users_missing"]
+        or any(integrity[view]["lost"] or integrity[view]["wrong_photo"] for view in ("live", "folded"))
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Photo contest concurrent voter load test")
+    parser.add_argument("--processes", type=int, default=4, help="worker processes")
+    parser.add_argument("--threads", type=int, default=25, help="concurrent voters per process")
+    parser.add_argument("--voters", type=int, default=400, help="simulated voters in total")
+    parser.add_argument("--moves", type=int, default=3, help="votes cast per voter (each moves the vote)")
+    parser.add_argument("--photos", type=int, default=100, help="photos in the generated contest")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="mean pause before each vote")
+    parser.add_argument("--compact-seconds", type=float, help="override the journal compaction interval")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="write results here instead of stdout")
+    parser.add_argument("--worker", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    parser.add_argument("--process-index", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--worker-voters", type=int, default=0, help=argparse.SUPPRESS)
+    parser.add_argument("--verify", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.worker:
+        result = worker(args.worker, args.process_index, args.worker_voters, args.threads, args.moves,
+                        args.think_ms, args.compact_seconds, args.seed)
+        print(json.dumps(result))
+        return
+    if args.verify:
+        print(json.dumps(verify(args.verify, json.loads(sys.stdin.read()))))
+        return
+
+    result = run(args)
+    output = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+    sys.exit(1 if failed(result) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Time full page reruns of app.py with Streamlit's AppTest.
+
+Usage:
+    python -m benchmarks.render [--photos 10,100,500,1000] [--votes 1000] [--repeat 3]
+                                [--budget-ms 1000] [--out FILE]
+
+For each photo count a contest is generated (see generate.py) and app.py is
+run headless, logged in once as a voter and once as ADMIN_USERNAME. Each step
+(the initial render, a vote click, an approve click) records the median wall
+time, peak Python memory (from a separate tracemalloc pass), process max RSS
+and the number of rendered elements. Results are also arranged as curves over
+photo count, with the largest contest each step rendered within --budget-ms.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.run import REPO_DIR, parse_counts, generate_scratch
+
+DEFAULT_PHOTOS = [10, 100, 500, 1000]
+DEFAULT_BUDGET_MS = 1000.0
+APP_TIMEOUT_SECONDS = 600
+
+
+def _count_elements(node) -> int:
+    """Rendered elements under node; layout blocks themselves are not counted."""
+    children = getattr(node, "children", None)
+    if children:
+        return sum(_count_elements(child) for child in children.values())
+    return 0 if type(node).__name__ in ("Block", "SpecialBlock") else 1
+
+
+def _step(at, action=None) -> dict:
+    """Run one rerun (optionally triggered by action(at)) and measure it."""
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    if action is None:
+        at.run()
+    else:
+        action(at)
+    wall_ms = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].message}")
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "peak_python_mb": (
+            round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 1) if tracemalloc.is_tracing() else None
+        ),
+        "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "elements": _count_elements(at._tree),
+    }
+
+
+def _app_test(user: dict):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(REPO_DIR, "app.py"), default_timeout=APP_TIMEOUT_SECONDS)
+    at.session_state.rules_acknowledged = True
+    at.session_state.authenticated_user = user
+    return at
+
+
+def _first_button(at, prefix: str):
+    for button in at.button:
+        if button.key and button.key.startswith(prefix) and not button.disabled:
+            return button
+    return None
+
+
+def measure(data_dir: str, repeat: int) -> list[dict]:
+    """Measure every role and step against a generated data_dir (run in a fresh process)."""
+    from benchmarks.generate import use_data_dir
+
+    app = use_data_dir(data_dir)
+    app.ensure_structure()
+    users = {
+        "voter": {"employee_id": "BENCHVOTER", "name": "Bench Voter", "is_admin": False},
+        "admin": {"employee_id": app.ADMIN_USERNAME.upper(), "name": "Admin User", "is_admin": True},
+    }
+    # One untimed pass pays for imports and warms the process-wide caches, like a running server
+    _app_test(users["voter"]).run()
+    rows = []
+    # Timed passes run untraced; one extra pass under tracemalloc (which slows everything) measures memory
+    for attempt in range(repeat + 1):
+        if attempt == repeat:
+            tracemalloc.start()
+        at = _app_test(users["voter"])
+        rows.append({"role": "voter", "step": "initial", **_step(at)})
+        button = _first_button(at, "vote-")
+        if button is not None:
+            rows.append({"role": "voter", "step": "vote_click", **_step(at, lambda at: button.click().run())})
+
+        at = _app_test(users["admin"])
+        rows.append({"role": "admin", "step": "initial", **_step(at)})
+        button = _first_button(at, "approve-")
+        if button is not None:
+            rows.append({"role": "admin", "step": "approve_click", **_step(at, lambda at: button.click().run())})
+    tracemalloc.stop()
+    app.get_vote_journal().close()
+    return rows
+
+
+def _median_rows(rows: list[dict]) -> list[dict]:
+    grouped = {}
+    for row in rows:
+        grouped.setdefault((row["role"], row["step"]), []).append(row)
+    medians = []
+    for (role, step), samples in grouped.items():
+        timed = sorted((row for row in samples if row["peak_python_mb"] is None), key=lambda row: row["wall_ms"])
+        traced = [row["peak_python_mb"] for row in samples if row["peak_python_mb"] is not None]
+        median = timed[len(timed) // 2] if timed else samples[0]
+        medians.append({
+            **median,
+            "role": role,
+            "step": step,
+            "peak_python_mb": max(traced) if traced else None,
+            "max_rss_mb": max(row["max_rss_mb"] for row in samples),
+            "runs": len(timed),
+        })
+    return medians
+
+
+def curves(points: list[dict], budget_ms: float) -> dict:
+    """{role/step: {"points": [[photos, wall_ms, elements], ...], "viable_up_to": photos}}."""
+    result = {}
+    for point in sorted(points, key=lambda point: point["photos"]):
+        for row in point["steps"]:
+            curve = result.setdefault(f"{row['role']}/{row['step']}", {"points": [], "viable_up_to": None})
+            curve["points"].append([point["photos"], row["wall_ms"], row["elements"]])
+    for curve in result.values():
+        within = [photos for photos, wall_ms, _ in curve["points"] if wall_ms <= budget_ms]
+        curve["viable_up_to"] = max(within) if within else None
+    return result
+
+
+def run(photo_counts: list[int], votes: int, repeat: int, budget_ms: float) -> dict:
+    points = []
+    for photos in photo_counts:
+        print(f"rendering photos={photos} votes={votes}", file=sys.stderr)
+        data_dir = generate_scratch(photos, votes)
+        try:
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.render", "--measure", data_dir, "--repeat", str(repeat)],
+                cwd=REPO_DIR, check=True, capture_output=True, text=True,
+            )
+        finally:
+            shutil.rmtree(data_dir, ignore_errors=True)
+        points.append({"photos": photos, "votes": votes, "steps": _median_rows(json.loads(completed.stdout))})
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "budget_ms": budget_ms,
+        },
+        "results": points,
+        "curves": curves(points, budget_ms),
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Photo contest page render benchmarks")
+    parser.add_argument("--photos", type=parse_counts, default=DEFAULT_PHOTOS, help="photo counts to sweep")
+    parser.add_argument("--votes", type=int, default=1000, help="votes in every contest")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per step (the median is reported)")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS, help="rerun time considered viable")
+    parser.add_argument("--out", help="write results here instead of stdout")
+    parser.add_argument("--measure", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.repeat)))
+        return
+    output = json.dumps(run(args.photos, args.votes, args.repeat, args.budget_ms), indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
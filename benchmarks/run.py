@@ -0,0 +1,240 @@
+"""Time the app's data-layer functions across growing synthetic contests.
+
+Usage:
+    python -m benchmarks.run [--photos 10,100,1000,5000] [--votes 100,1000,10000,100000]
+                             [--base-photos 500] [--base-votes 1000] [--repeat 5] [--out FILE]
+    python -m benchmarks.run --compare BASELINE.json CURRENT.json [--threshold 1.25]
+
+Two sweeps are run: photo counts at --base-votes votes, and vote counts at
+--base-photos photos. Every point is generated in its own scratch directory
+and measured in a fresh process, so caches and singletons start cold. Results
+are JSON; --compare flags operations whose median got slower than the baseline
+by more than --threshold (and by more than NOISE_FLOOR_MS). Each point also
+records the in-memory size of the shared photos and ratings frames.
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PHOTOS = [10, 100, 1000, 5000]
+DEFAULT_VOTES = [100, 1000, 10000, 100000]
+DEFAULT_THRESHOLD = 1.25
+# Differences below this are timer noise, whatever the ratio
+NOISE_FLOOR_MS = 1.0
+
+
+def _timed(fn, repeat: int, setup=None) -> dict:
+    samples = []
+    for _ in range(repeat):
+        argument = setup() if setup else None
+        started = time.perf_counter()
+        fn(argument) if setup else fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": round(min(samples), 3),
+        "max_ms": round(max(samples), 3),
+        "runs": repeat,
+    }
+
+
+def filter_photos(photos_df, employee_id: str) -> None:
+    """The per-rerun filters of the page sections: status groups and one user's photos."""
+    for status in ("approved", "pending", "rejected"):
+        photos_df[photos_df["status"] == status]
+    photos_df[photos_df["uploader"] == employee_id]
+
+
+def frame_bytes(df) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def measure(data_dir: str, repeat: int) -> dict:
+    """Time each data-layer operation against an already generated data_dir (run in a fresh process).
+
+    Returns {"timings": {...}, "memory": {...}}; memory is the deep size of the shared frames.
+    """
+    from benchmarks.generate import make_image, use_data_dir
+
+    app = use_data_dir(data_dir)
+    rng = random.Random(1)
+    app.ensure_structure()
+    photos_df = app.load_photos()
+    approved = photos_df[photos_df["status"] == "approved"]["photo_id"].tolist()
+    pending = photos_df[photos_df["status"] == "pending"]["photo_id"].tolist()
+    upload_bytes = make_image(99, (1600, 1200))
+
+    class Upload(io.BytesIO):
+        name = "bench.jpg"
+
+    def cold(fn):
+        # Drop the shared snapshots so the call pays for a full load
+        def run():
+            app.snapshot_cache.invalidate()
+            return fn()
+        return run
+
+    timings = {
+        "load_data": _timed(cold(app.load_data), repeat),
+        "load_data_warm": _timed(app.load_data, repeat),
+        "load_users": _timed(cold(app.load_users), repeat),
+        "compute_leaderboard": _timed(cold(app.compute_leaderboard), repeat),
+        "publish_results": _timed(app.publish_results, repeat),
+        "load_results": _timed(cold(app.get_results), repeat),
+        "load_results_warm": _timed(app.get_results, repeat),
+        "filter_photos": _timed(lambda: filter_photos(app.load_photos(), "E000000"), repeat),
+    }
+    memory = {
+        "photos_frame_bytes": frame_bytes(app.load_photos()),
+        "ratings_frame_bytes": frame_bytes(app.load_ratings()),
+    }
+    if approved:
+        voters = iter(f"BENCH{index:06d}" for index in range(10**6))
+        timings["save_rating"] = _timed(
+            lambda photo_id: app.save_rating(photo_id, next(voters), 1), repeat, lambda: rng.choice(approved)
+        )
+
+        def image_target():
+            photo_id = rng.choice(approved)
+            app.get_image_cache().invalidate(photo_id, app.IMAGE_CACHE_VARIANTS)
+            return photos_df[photos_df["photo_id"] == photo_id].iloc[0]
+
+        # load() forces the decode that st.image would otherwise do later
+        timings["get_photo_image"] = _timed(lambda row: app.get_photo_image(row, "full").load(), repeat, image_target)
+    timings["save_photo"] = _timed(
+        lambda upload: app.save_photo(upload, "Bench", "BENCHUPLOADER", app.THEMES[0]),
+        repeat,
+        lambda: Upload(upload_bytes),
+    )
+    if pending:
+        targets = iter(pending * repeat)
+        timings["approve_photo"] = _timed(app.approve_photo, repeat, lambda: next(targets))
+    if len(approved) > repeat:
+        victims = iter(rng.sample(approved, repeat))
+        timings["delete_photo"] = _timed(app.delete_photo, repeat, lambda: next(victims))
+    app.get_vote_journal().close()
+    return {"timings": timings, "memory": memory}
+
+
+def generate_scratch(photos: int, votes: int, users: int | None = None) -> str:
+    """Generate a contest in a new temporary directory and return its path (users defaults to votes)."""
+    data_dir = tempfile.mkdtemp(prefix=f"contest-bench-{photos}p-{votes}v-")
+    # Generation imports app for data_dir, so it runs in a child process
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.generate", data_dir, "--users", str(votes if users is None else users),
+         "--photos", str(photos), "--votes", str(votes)],
+        cwd=REPO_DIR, check=True, stdout=subprocess.DEVNULL,
+    )
+    return data_dir
+
+
+def run_point(photos: int, votes: int, repeat: int) -> dict:
+    """Generate one contest size and measure it in a child process."""
+    data_dir = generate_scratch(photos, votes)
+    completed = subprocess.run(
+        [sys.executable, "-m", "benchmarks.run", "--measure", data_dir, "--repeat", str(repeat)],
+        cwd=REPO_DIR, check=True, capture_output=True, text=True,
+    )
+    shutil.rmtree(data_dir, ignore_errors=True)
+    return {"photos": photos, "votes": votes, "users": votes, **json.loads(completed.stdout)}
+
+
+def run_sweeps(photo_counts, vote_counts, base_photos: int, base_votes: int, repeat: int) -> dict:
+    points = []
+    seen = set()
+    for photos, votes in [(m, base_votes) for m in photo_counts] + [(base_photos, k) for k in vote_counts]:
+        if (photos, votes) in seen:
+            continue
+        seen.add((photos, votes))
+        print(f"measuring photos={photos} votes={votes}", file=sys.stderr)
+        points.append(run_point(photos, votes, repeat))
+    return {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+        },
+        "results": points,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = DEFAULT_THRESHOLD) -> list[dict]:
+    """Operations whose median time regressed beyond threshold at the same contest size."""
+    baseline_points = {(p["photos"], p["votes"], p["users"]): p["timings"] for p in baseline["results"]}
+    regressions = []
+    for point in current["results"]:
+        before = baseline_points.get((point["photos"], point["votes"], point["users"]))
+        if before is None:
+            continue
+        for operation, timing in point["timings"].items():
+            if operation not in before:
+                continue
+            old, new = before[operation]["median_ms"], timing["median_ms"]
+            if new > old * threshold and new - old > NOISE_FLOOR_MS:
+                regressions.append({
+                    "photos": point["photos"],
+                    "votes": point["votes"],
+                    "operation": operation,
+                    "baseline_ms": old,
+                    "current_ms": new,
+                    "ratio": round(new / old, 2) if old else None,
+                })
+    return regressions
+
+
+def parse_counts(value: str) -> list[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Photo contest data-layer benchmarks")
+    parser.add_argument("--photos", type=parse_counts, default=DEFAULT_PHOTOS, help="photo counts to sweep")
+    parser.add_argument("--votes", type=parse_counts, default=DEFAULT_VOTES, help="vote counts to sweep")
+    parser.add_argument("--base-photos", type=int, default=500, help="photos during the vote sweep")
+    parser.add_argument("--base-votes", type=int, default=1000, help="votes during the photo sweep")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per operation")
+    parser.add_argument("--out", help="write results here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"), help="compare two result files")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="slowdown ratio flagged by --compare")
+    parser.add_argument("--measure", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.repeat)))
+        return
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        print(json.dumps({"threshold": args.threshold, "regressions": regressions}, indent=2))
+        sys.exit(1 if regressions else 0)
+
+    results = run_sweeps(args.photos, args.votes, args.base_photos, args.base_votes, args.repeat)
+    output = json.dumps(results, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
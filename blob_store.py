@@ -0,0 +1,75 @@
+"""Content-addressed on-disk blob store for image bytes.
+
+Blobs are keyed by the SHA-256 of their content and stored as
+<root>/<first two hex chars>/<full hex digest>, so identical uploads are
+stored once and the photos table only needs to hold the digest.
+"""
+
+import hashlib
+import os
+import threading
+import uuid
+
+import perf
+
+_instances: dict[str, "BlobStore"] = {}
+_instances_lock = threading.Lock()
+
+
+def open_blob_store(root: str) -> "BlobStore":
+    """Return the process-wide BlobStore for root, creating it on first use."""
+    root = os.path.abspath(root)
+    with _instances_lock:
+        store = _instances.get(root)
+        if store is None:
+            store = BlobStore(root)
+            _instances[root] = store
+        return store
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class BlobStore:
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key)
+
+    def exists(self, key: str) -> bool:
+        return bool(key) and os.path.exists(self.path(key))
+
+    def put(self, data: bytes) -> str:
+        """Store data and return its key. Existing content is not rewritten."""
+        key = digest(data)
+        path = self.path(key)
+        if os.path.exists(path):
+            return key
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name so concurrent writers of the same blob don't collide
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with perf.span("blob.write") as span, open(tmp_path, "wb") as f:
+            f.write(data)
+            span.add_bytes(len(data))
+        os.replace(tmp_path, path)
+        return key
+
+    def get(self, key: str) -> bytes | None:
+        if not key:
+            return None
+        try:
+            with perf.span("blob.read") as span, open(self.path(key), "rb") as f:
+                data = f.read()
+                span.add_bytes(len(data))
+                return data
+        except FileNotFoundError:
+            return None
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except (FileNotFoundError, TypeError):
+            pass
@@ -0,0 +1,118 @@
+"""Single writer thread with group commit for database mutations.
+
+Script threads submit mutations and get a Future back. One writer thread
+drains whatever is queued, applies the whole batch inside a single write
+transaction and commits once, so N concurrent writers cost one
+BEGIN IMMEDIATE/COMMIT instead of N transactions contending for the lock.
+Each mutation runs under its own SAVEPOINT, so one that fails is rolled back
+and reported on its own Future without taking the rest of the batch with it.
+"""
+
+import queue
+import threading
+from concurrent.futures import Future
+
+DEFAULT_MAX_BATCH = 64
+
+_instances: dict[str, "CommitQueue"] = {}
+_instances_lock = threading.Lock()
+
+
+def open_commit_queue(storage, **options) -> "CommitQueue":
+    """Return the process-wide CommitQueue for a storage engine, creating it on first use."""
+    with _instances_lock:
+        commit_queue = _instances.get(storage.db_path)
+        if commit_queue is None:
+            commit_queue = CommitQueue(storage, **options)
+            _instances[storage.db_path] = commit_queue
+        return commit_queue
+
+
+class CommitQueue:
+    def __init__(self, storage, max_batch: int = DEFAULT_MAX_BATCH) -> None:
+        self.storage = storage
+        self.max_batch = max_batch
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._counters = {"batches": 0, "mutations": 0, "failed": 0, "largest_batch": 0}
+        self._writer = threading.Thread(target=self._run, name="commit-queue", daemon=True)
+        self._writer.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """Queue fn(*args, **kwargs) to run on the writer thread; the Future resolves after COMMIT.
+
+        fn typically is a Storage method; its own transaction() joins the batch's.
+        """
+        future: Future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def run(self, fn, *args, **kwargs):
+        """submit() and wait for the result."""
+        return self.submit(fn, *args, **kwargs).result()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Group commit: everything that queued up while the last batch committed goes in this one
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._apply(batch)
+                    return
+                batch.append(item)
+            self._apply(batch)
+
+    def _apply(self, batch: list) -> None:
+        outcomes = []
+        try:
+            with self.storage.transaction() as conn:
+                for fn, args, kwargs, future in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT mutation")
+                    try:
+                        result = fn(*args, **kwargs)
+                    except Exception as exc:
+                        conn.execute("ROLLBACK TO mutation")
+                        conn.execute("RELEASE mutation")
+                        outcomes.append((future, None, exc))
+                    else:
+                        conn.execute("RELEASE mutation")
+                        outcomes.append((future, result, None))
+        except Exception as exc:
+            # BEGIN or COMMIT failed: nothing in the batch was written
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            self._count(len(batch), len(batch))
+            return
+
+        for future, result, exc in outcomes:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+        self._count(len(batch), sum(1 for _, _, exc in outcomes if exc is not None))
+
+    def _count(self, size: int, failed: int) -> None:
+        with self._lock:
+            self._counters["batches"] += 1
+            self._counters["mutations"] += size
+            self._counters["failed"] += failed
+            self._counters["largest_batch"] = max(self._counters["largest_batch"], size)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._counters)
+
+    def close(self) -> None:
+        """Apply everything already queued, then stop the writer."""
+        self._queue.put(None)
+        self._writer.join()
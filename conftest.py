@@ -0,0 +1 @@
+# Lets plain `pytest` (not only `python -m pytest`) import the app's top-level modules from tests/
@@ -0,0 +1,90 @@
+"""Typed view of the contest settings kept in config.json.
+
+The file is parsed once and the resulting ContestState is shared by every
+session until the file's mtime/size changes (see snapshot_cache). A rerun
+loads it once and passes it down instead of re-reading the file per helper.
+"""
+
+import json
+import os
+import threading
+import uuid
+from dataclasses import asdict, dataclass
+from datetime import date, datetime
+
+import perf
+import snapshot_cache
+
+# Bumped by save() so a rewrite within one mtime tick is still noticed in this process
+_generation = 0
+_generation_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class ContestState:
+    upload_deadline: str | None = None  # YYYY-MM-DD
+    voting_ended: bool = False
+
+    @property
+    def phase(self) -> str:
+        """'results' once voting has ended, otherwise 'active'."""
+        return "results" if self.voting_ended else "active"
+
+    @property
+    def deadline_date(self) -> date | None:
+        try:
+            return datetime.strptime(self.upload_deadline, "%Y-%m-%d").date()
+        except (ValueError, TypeError):
+            return None
+
+    @property
+    def upload_deadline_passed(self) -> bool:
+        """True once the current date is after the upload deadline."""
+        deadline_date = self.deadline_date
+        return deadline_date is not None and date.today() > deadline_date
+
+    @property
+    def countdown(self) -> str:
+        """Countdown text until the upload deadline."""
+        if not self.upload_deadline:
+            return "No deadline set"
+        deadline_date = self.deadline_date
+        if deadline_date is None:
+            return "Invalid deadline format"
+        today = date.today()
+        if today > deadline_date:
+            return "Upload deadline has passed"
+        elif today == deadline_date:
+            return "⏰ Upload deadline is today!"
+        else:
+            days_left = (deadline_date - today).days
+            return f"⏰ {days_left} day(s) remaining to upload"
+
+
+def _read(path: str) -> ContestState:
+    try:
+        with perf.span("config.read"), open(path, "r") as f:
+            config = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return ContestState()
+    # Older config files (voting_phase_enabled, no upload_deadline) load as "no deadline"
+    return ContestState(
+        upload_deadline=config.get("upload_deadline"),
+        voting_ended=bool(config.get("voting_ended", False)),
+    )
+
+
+def load(path: str) -> ContestState:
+    """Current contest state, re-read only when the file changed."""
+    return snapshot_cache.get("contest_state", [path], lambda: _read(path), generation=lambda: _generation)
+
+
+def save(path: str, state: ContestState) -> None:
+    """Write the state atomically (temp file + rename), so readers never see a partial file."""
+    global _generation
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with perf.span("config.write"), open(tmp_path, "w") as f:
+        json.dump(asdict(state), f)
+    os.replace(tmp_path, path)
+    with _generation_lock:
+        _generation += 1
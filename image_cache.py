@@ -0,0 +1,315 @@
+"""Process-wide two-tier cache of encoded image bytes.
+
+Entries are keyed by (photo_id, rendition). The first tier is a size-bounded
+in-memory LRU shared by every session. Remote images additionally go to an
+on-disk tier; a memory miss that finds a disk entry revalidates it with
+If-None-Match / If-Modified-Since, so an unchanged image costs a 304 instead
+of a full download. The disk tier has a byte budget too: a hit refreshes the
+entry's mtime, and once the tier grows past its budget the least recently
+used entries (oldest mtime, across every process sharing the directory) are
+deleted until it is back under DISK_TRIM_RATIO of the budget.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import perf
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 512 * 1024 * 1024
+# Eviction trims the disk tier to this share of its budget, so it doesn't rescan on every put
+DISK_TRIM_RATIO = 0.9
+DEFAULT_FETCH_WORKERS = 8
+# Per-request (connect, read) deadline
+FETCH_TIMEOUT_SECONDS = (3.05, 10)
+
+_instances: dict[str, "ImageCache"] = {}
+_instances_lock = threading.Lock()
+
+
+def open_image_cache(cache_dir: str, **options) -> "ImageCache":
+    """Return the process-wide ImageCache for cache_dir, creating it on first use."""
+    cache_dir = os.path.abspath(cache_dir)
+    with _instances_lock:
+        cache = _instances.get(cache_dir)
+        if cache is None:
+            cache = ImageCache(cache_dir, **options)
+            _instances[cache_dir] = cache
+        return cache
+
+
+class ImageCache:
+    def __init__(
+        self,
+        cache_dir: str,
+        max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+        fetch_workers: int = DEFAULT_FETCH_WORKERS,
+    ) -> None:
+        self.cache_dir = cache_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._memory_bytes = 0
+        # Striped locks so concurrent misses on the same key load it once
+        self._key_locks = [threading.Lock() for _ in range(256)]
+        # One keep-alive session for every fetch, created (and requests imported) on the first fetch
+        self._fetch_workers = fetch_workers
+        self._session = None
+        self._executor = ThreadPoolExecutor(max_workers=fetch_workers, thread_name_prefix="image-fetch")
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "revalidated": 0,
+            "misses": 0,
+            "fetches": 0,
+            "fetch_errors": 0,
+            "evictions": 0,
+            "disk_evictions": 0,
+            "invalidations": 0,
+        }
+        # Running estimate of the disk tier's size (this process's writes on top of the last scan)
+        self._disk_lock = threading.Lock()
+        self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    def _get_session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+
+                # Connection pool sized to the fetch workers
+                self._session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=self._fetch_workers, pool_maxsize=self._fetch_workers)
+                self._session.mount("https://", adapter)
+                self._session.mount("http://", adapter)
+            return self._session
+
+    # Memory tier
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def _memory_get(self, key: tuple[str, str]) -> bytes | None:
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+            return data
+
+    def _memory_put(self, key: tuple[str, str], data: bytes) -> None:
+        if len(data) > self.max_memory_bytes:
+            return
+        with self._lock:
+            previous = self._memory.pop(key, None)
+            if previous is not None:
+                self._memory_bytes -= len(previous)
+            self._memory[key] = data
+            self._memory_bytes += len(data)
+            while self._memory_bytes > self.max_memory_bytes:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+                self._counters["evictions"] += 1
+
+    def _key_lock(self, key: tuple[str, str]) -> threading.Lock:
+        return self._key_locks[hash(key) % len(self._key_locks)]
+
+    # Disk tier
+
+    def _disk_path(self, key: tuple[str, str]) -> str:
+        name = hashlib.sha256(f"{key[0]}\0{key[1]}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, name)
+
+    def _disk_entries(self) -> list[tuple[float, int, str]]:
+        """(mtime, bytes incl. metadata, path) of every complete disk entry."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if "." in name:
+                continue  # metadata and temp files are counted with their entry
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+                size = st.st_size + os.stat(f"{path}.json").st_size
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, size, path))
+        return entries
+
+    def _disk_get(self, key: tuple[str, str]) -> tuple[bytes, dict] | None:
+        path = self._disk_path(key)
+        try:
+            with open(f"{path}.json", "r") as f:
+                meta = json.load(f)
+            with open(path, "rb") as f:
+                data = f.read()
+            # Recently used, for eviction
+            os.utime(path)
+            return data, meta
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _disk_trim(self) -> None:
+        """Delete least recently used disk entries until the tier is under DISK_TRIM_RATIO of its budget."""
+        with self._disk_lock:
+            entries = sorted(self._disk_entries())
+            total = sum(size for _, size, _ in entries)
+            target = self.max_disk_bytes * DISK_TRIM_RATIO
+            evicted = 0
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                for file_path in (path, f"{path}.json"):
+                    try:
+                        os.remove(file_path)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+                evicted += 1
+            self._disk_bytes = total
+        self._count("disk_evictions", evicted)
+
+    def _disk_put(self, key: tuple[str, str], data: bytes, meta: dict) -> None:
+        path = self._disk_path(key)
+        suffix = uuid.uuid4().hex
+        with open(f"{path}.{suffix}.tmp", "wb") as f:
+            f.write(data)
+        os.replace(f"{path}.{suffix}.tmp", path)
+        meta_json = json.dumps(meta)
+        with open(f"{path}.json.{suffix}.tmp", "w") as f:
+            f.write(meta_json)
+        os.replace(f"{path}.json.{suffix}.tmp", f"{path}.json")
+        with self._disk_lock:
+            self._disk_bytes += len(data) + len(meta_json)
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._disk_trim()
+
+    def _disk_delete(self, key: tuple[str, str]) -> None:
+        path = self._disk_path(key)
+        for file_path in (path, f"{path}.json"):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+
+    # Public API
+
+    def get(self, photo_id: str, rendition: str, loader) -> bytes | None:
+        """Bytes of a local image, loaded with loader() on a memory miss."""
+        key = (photo_id, rendition)
+        data = self._memory_get(key)
+        if data is not None:
+            return data
+        with self._key_lock(key):
+            data = self._memory_get(key)
+            if data is not None:
+                return data
+            self._count("misses")
+            data = loader()
+            if data:
+                self._memory_put(key, data)
+            return data or None
+
+    def fetch(self, photo_id: str, rendition: str, url: str) -> bytes | None:
+        """Bytes of a remote image, via memory, then a revalidated disk entry, then HTTP."""
+        key = (photo_id, rendition)
+        data = self._memory_get(key)
+        if data is not None:
+            return data
+        with self._key_lock(key):
+            data = self._memory_get(key)
+            if data is not None:
+                return data
+
+            cached = self._disk_get(key)
+            headers = {}
+            if cached is not None and cached[1].get("url") == url:
+                if cached[1].get("etag"):
+                    headers["If-None-Match"] = cached[1]["etag"]
+                if cached[1].get("last_modified"):
+                    headers["If-Modified-Since"] = cached[1]["last_modified"]
+            else:
+                cached = None
+                self._count("misses")
+
+            import requests
+
+            try:
+                self._count("fetches")
+                with perf.span("image.fetch") as span:
+                    response = self._get_session().get(url, headers=headers, timeout=FETCH_TIMEOUT_SECONDS)
+                    span.add_bytes(len(response.content))
+            except requests.RequestException:
+                self._count("fetch_errors")
+                response = None
+
+            if response is not None and response.status_code == 304 and cached is not None:
+                self._count("revalidated")
+                data = cached[0]
+            elif response is not None and response.status_code == 200:
+                data = response.content
+                self._disk_put(key, data, {
+                    "url": url,
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "fetched_at": time.time(),
+                })
+            elif cached is not None:
+                # Remote unreachable: serve the stale disk copy rather than nothing
+                self._count("disk_hits")
+                data = cached[0]
+            else:
+                if response is not None:
+                    self._count("fetch_errors")
+                return None
+
+            self._memory_put(key, data)
+            return data
+
+    def map(self, loaders: list, deadline: float | None = None) -> list:
+        """Run zero-argument loaders on the fetch pool; results come back in input order.
+
+        A loader that fails, or is still running when the deadline (in seconds)
+        expires, yields None. Late loaders keep running and still warm the cache.
+        """
+        futures = [self._executor.submit(loader) for loader in loaders]
+        done, _ = wait(futures, timeout=deadline)
+        results = []
+        for future in futures:
+            if future in done and future.exception() is None:
+                results.append(future.result())
+            else:
+                results.append(None)
+        return results
+
+    def invalidate(self, photo_id: str, renditions: list[str]) -> None:
+        """Drop every listed rendition of a photo from both tiers."""
+        for rendition in renditions:
+            key = (photo_id, rendition)
+            with self._lock:
+                data = self._memory.pop(key, None)
+                if data is not None:
+                    self._memory_bytes -= len(data)
+                self._counters["invalidations"] += 1
+            self._disk_delete(key)
+
+    def stats(self) -> dict:
+        """Counters plus current memory usage and the estimated disk usage."""
+        with self._lock:
+            return {
+                **self._counters,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
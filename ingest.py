@@ -0,0 +1,71 @@
+"""Upload ingest: validate from the header, decode once at reduced size, encode once.
+
+An upload is checked for format and pixel count before any pixel data is
+decoded. JPEGs are then decoded straight to roughly the target size via
+Image.draft (DCT scaling), EXIF orientation is applied, and the image is
+encoded a single time; those bytes are what every storage target receives.
+"""
+
+import io
+from dataclasses import dataclass
+
+import renditions
+
+ALLOWED_FORMATS = {"JPEG", "PNG"}
+DEFAULT_MAX_EDGE = 2048
+# Refuse anything bigger before decoding (a 100 MP JPEG already decodes to 300 MB of RGB)
+DEFAULT_MAX_PIXELS = 100_000_000
+MASTER_QUALITY = renditions.RENDITION_QUALITY
+
+
+class IngestError(ValueError):
+    """The upload is not an image we accept."""
+
+
+@dataclass
+class IngestedImage:
+    master: bytes  # JPEG, longest edge <= max_edge, orientation applied
+    renditions: dict[str, bytes]
+    width: int
+    height: int
+
+
+def ingest(file, max_edge: int = DEFAULT_MAX_EDGE, max_pixels: int = DEFAULT_MAX_PIXELS) -> IngestedImage:
+    """Validate and normalize an uploaded image file; raises IngestError if it is rejected."""
+    # Imported here so the app only pays for PIL once someone uploads or views a decoded image
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        # Image.open only parses the header; nothing is decoded yet
+        image = Image.open(file)
+    except Image.DecompressionBombError:
+        # Raised by Image.open itself for headers past PIL's own limit (about 179 MP)
+        raise IngestError("Image is too large. Please upload a smaller photo.")
+    except (UnidentifiedImageError, OSError):
+        raise IngestError("The file is not a readable image.")
+    if image.format not in ALLOWED_FORMATS:
+        raise IngestError(f"Unsupported image format: {image.format}. Please upload a JPG or PNG.")
+    width, height = image.size
+    if width <= 0 or height <= 0 or width * height > max_pixels:
+        raise IngestError(f"Image is too large ({width}x{height}). Please upload a smaller photo.")
+
+    try:
+        if image.format == "JPEG":
+            # Let the decoder scale by 1/2, 1/4 or 1/8 while decoding (never below max_edge)
+            image.draft("RGB", (max_edge, max_edge))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGB")
+        # Image.reduce() does the coarse part of the downscale before the LANCZOS pass
+        image.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=3.0)
+    except (OSError, Image.DecompressionBombError, SyntaxError):
+        raise IngestError("The image could not be decoded.")
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=MASTER_QUALITY, optimize=True, progressive=True)
+    master = buffer.getvalue()
+    return IngestedImage(
+        master=master,
+        renditions=renditions.render(image, encoded_source=master),
+        width=image.width,
+        height=image.height,
+    )
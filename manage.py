@@ -0,0 +1,100 @@
+"""Maintenance commands for the photo contest data directory.
+
+Usage:
+    python manage.py import-csv [--photos PATH] [--ratings PATH] [--users PATH]
+    python manage.py export-csv [--photos PATH] [--ratings PATH] [--users PATH]
+    python manage.py compact-votes
+    python manage.py migrate-blobs [--csv PATH [--out PATH]]
+    python manage.py backfill-renditions
+    python manage.py verify-tallies
+"""
+
+import argparse
+import json
+
+import app
+import storage
+
+
+def cmd_import_csv(args: argparse.Namespace) -> dict:
+    """Load photos/ratings/users CSV files into the database."""
+    app.ensure_structure()
+    # Base64 images in the CSV go to the blob store, like the automatic first-run import
+    return app.get_storage().import_csv(args.photos, args.ratings, args.users, blob_store=app.get_blob_store())
+
+
+def cmd_export_csv(args: argparse.Namespace) -> dict:
+    """Write the database out as photos/ratings/users CSV files."""
+    app.ensure_structure()
+    # Fold pending votes first so the export is complete
+    app.get_vote_journal().compact()
+    return app.get_storage().export_csv(args.photos, args.ratings, args.users)
+
+
+def cmd_compact_votes(args: argparse.Namespace) -> dict:
+    """Fold the vote journal into the database."""
+    app.ensure_structure()
+    return {"records_folded": app.get_vote_journal().compact()}
+
+
+def cmd_migrate_blobs(args: argparse.Namespace) -> dict:
+    """Move base64 images out of the database (or a photos CSV) into the blob store."""
+    if args.csv:
+        rows = storage.migrate_photos_csv(args.csv, args.out or args.csv, app.get_blob_store())
+        return {"csv_rows": rows}
+    app.ensure_structure()
+    return {"photos_migrated": app.get_storage().migrate_base64_to_blobs(app.get_blob_store())}
+
+
+def cmd_backfill_renditions(args: argparse.Namespace) -> dict:
+    """Generate gallery renditions for photos that don't have them yet."""
+    app.ensure_structure()
+    return {"photos_updated": app.backfill_renditions()}
+
+
+def cmd_verify_tallies(args: argparse.Namespace) -> dict:
+    """Recompute vote counts from scratch and report drift from the live counters."""
+    app.ensure_structure()
+    drift = app.verify_vote_tallies()
+    return {
+        "drifted_photos": len(drift),
+        "drift": {photo_id: {"counted": counted, "expected": expected} for photo_id, (counted, expected) in drift.items()},
+    }
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Photo contest maintenance commands")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    for name, func in (("import-csv", cmd_import_csv), ("export-csv", cmd_export_csv)):
+        sub = subparsers.add_parser(name, help=func.__doc__)
+        sub.add_argument("--photos", default=app.PHOTOS_CSV, help="photos CSV path")
+        sub.add_argument("--ratings", default=app.RATINGS_CSV, help="ratings CSV path")
+        sub.add_argument("--users", default=app.USERS_CSV, help="users CSV path")
+        sub.set_defaults(func=func)
+
+    sub = subparsers.add_parser("compact-votes", help=cmd_compact_votes.__doc__)
+    sub.set_defaults(func=cmd_compact_votes)
+
+    sub = subparsers.add_parser("migrate-blobs", help=cmd_migrate_blobs.__doc__)
+    sub.add_argument("--csv", help="rewrite this photos CSV instead of the database")
+    sub.add_argument("--out", help="output path for --csv (defaults to rewriting in place)")
+    sub.set_defaults(func=cmd_migrate_blobs)
+
+    sub = subparsers.add_parser("backfill-renditions", help=cmd_backfill_renditions.__doc__)
+    sub.set_defaults(func=cmd_backfill_renditions)
+
+    sub = subparsers.add_parser("verify-tallies", help=cmd_verify_tallies.__doc__)
+    sub.set_defaults(func=cmd_verify_tallies)
+
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    result = args.func(args)
+    print(json.dumps(result, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
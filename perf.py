@@ -0,0 +1,216 @@
+"""Lightweight span timing for reruns, page sections and I/O primitives.
+
+Code marks spans with `with perf.span("name") as s:` (s.add_bytes(n) for data
+moved) or the @perf.timed("name") decorator, and main() is wrapped in
+perf.rerun_scope. While recording is off, a span is a module-global check
+returning a shared no-op object, so instrumented code pays almost nothing.
+
+While on, every span updates process-wide counters (count, bytes and a rolling
+window of durations for p50/p95/p99). Spans on the script thread are also
+summed per rerun; each rerun is appended as one JSON line to a rotating log.
+"""
+
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+
+DEFAULT_WINDOW = 1000  # durations kept per span for percentiles
+DEFAULT_RERUNS = 50  # recent reruns kept for the rolling per-rerun view
+DEFAULT_LOG_BYTES = 5 * 1024 * 1024
+DEFAULT_LOG_BACKUPS = 3
+
+_recorder: "Recorder | None" = None
+_recorder_lock = threading.Lock()
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def add_bytes(self, count: int) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("recorder", "name", "started", "bytes")
+
+    def __init__(self, recorder: "Recorder", name: str) -> None:
+        self.recorder = recorder
+        self.name = name
+        self.bytes = 0
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.recorder.record(self.name, (time.perf_counter() - self.started) * 1000, self.bytes)
+        return False
+
+    def add_bytes(self, count: int) -> None:
+        self.bytes += count or 0
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class Recorder:
+    def __init__(
+        self,
+        log_path: str | None = None,
+        window: int = DEFAULT_WINDOW,
+        reruns: int = DEFAULT_RERUNS,
+        log_bytes: int = DEFAULT_LOG_BYTES,
+        log_backups: int = DEFAULT_LOG_BACKUPS,
+    ) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self._spans: dict[str, dict] = {}
+        self._reruns: deque = deque(maxlen=reruns)
+        self._local = threading.local()
+        self._logger = None
+        if log_path:
+            os.makedirs(os.path.dirname(log_path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(log_path, maxBytes=log_bytes, backupCount=log_backups)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger = logging.getLogger(f"perf.{os.path.abspath(log_path)}")
+            self._logger.setLevel(logging.INFO)
+            self._logger.propagate = False
+            self._logger.handlers = [handler]
+
+    def record(self, name: str, ms: float, bytes_moved: int = 0) -> None:
+        with self._lock:
+            stats = self._spans.get(name)
+            if stats is None:
+                stats = self._spans[name] = {"count": 0, "bytes": 0, "durations": deque(maxlen=self.window)}
+            stats["count"] += 1
+            stats["bytes"] += bytes_moved
+            stats["durations"].append(ms)
+        current = getattr(self._local, "rerun", None)
+        if current is not None:
+            totals = current.setdefault(name, [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += ms
+            totals[2] += bytes_moved
+
+    def begin_rerun(self) -> None:
+        self._local.rerun = {}
+        self._local.rerun_started = time.perf_counter()
+
+    def end_rerun(self) -> None:
+        spans = getattr(self._local, "rerun", None)
+        if spans is None:
+            return
+        entry = {
+            "ts": time.time(),
+            "rerun_ms": round((time.perf_counter() - self._local.rerun_started) * 1000, 3),
+            "spans": {
+                name: {"count": count, "ms": round(ms, 3), "bytes": bytes_moved}
+                for name, (count, ms, bytes_moved) in spans.items()
+            },
+        }
+        self._local.rerun = None
+        with self._lock:
+            self._reruns.append(entry)
+        if self._logger is not None:
+            self._logger.info(json.dumps(entry))
+
+    def stats(self) -> dict[str, dict]:
+        """Per span: count, bytes and p50/p95/p99 (ms) over the rolling window."""
+        with self._lock:
+            snapshot = {name: (s["count"], s["bytes"], sorted(s["durations"])) for name, s in self._spans.items()}
+        return {
+            name: {
+                "count": count,
+                "bytes": bytes_moved,
+                "p50_ms": _percentile(ordered, 0.50),
+                "p95_ms": _percentile(ordered, 0.95),
+                "p99_ms": _percentile(ordered, 0.99),
+            }
+            for name, (count, bytes_moved, ordered) in snapshot.items()
+            if ordered
+        }
+
+    def rerun_summary(self) -> dict:
+        """Averages over the recent reruns: total rerun time and time per span."""
+        with self._lock:
+            reruns = list(self._reruns)
+        if not reruns:
+            return {"reruns": 0, "rerun_ms": 0.0, "spans": {}}
+        per_span: dict[str, list[float]] = {}
+        for entry in reruns:
+            for name, totals in entry["spans"].items():
+                per_span.setdefault(name, []).append(totals["ms"])
+        return {
+            "reruns": len(reruns),
+            "rerun_ms": sum(entry["rerun_ms"] for entry in reruns) / len(reruns),
+            "spans": {name: sum(values) / len(reruns) for name, values in per_span.items()},
+        }
+
+
+def enable(log_path: str | None = None, **options) -> "Recorder":
+    """Start recording (process-wide). Returns the active recorder; enabling twice keeps the first."""
+    global _recorder
+    with _recorder_lock:
+        if _recorder is None:
+            _recorder = Recorder(log_path, **options)
+        return _recorder
+
+
+def disable() -> None:
+    global _recorder
+    with _recorder_lock:
+        _recorder = None
+
+
+def recorder() -> "Recorder | None":
+    return _recorder
+
+
+def span(name: str):
+    """Context manager timing a block; a shared no-op while recording is off."""
+    current = _recorder
+    if current is None:
+        return _NULL_SPAN
+    return _Span(current, name)
+
+
+def timed(name: str):
+    """Decorator form of span()."""
+    def decorate(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            current = _recorder
+            if current is None:
+                return fn(*args, **kwargs)
+            with _Span(current, name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def rerun_scope(fn):
+    """Decorator for the script entry point: groups the spans of one rerun."""
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        current = _recorder
+        if current is None:
+            return fn(*args, **kwargs)
+        current.begin_rerun()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            current.end_rerun()
+    return wrapper
@@ -0,0 +1,104 @@
+"""One-shot cProfile + tracemalloc capture of a single rerun.
+
+capture() wraps one block: it profiles the calling thread with cProfile and
+traces allocations with tracemalloc, then saves <stamp>.prof (open it with
+pstats or snakeviz) and <stamp>.alloc.txt (top allocation sites) in the
+output directory. Only one capture runs at a time; tracemalloc is
+process-wide, so allocations made by other sessions meanwhile are included.
+"""
+
+import cProfile
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+
+DEFAULT_TOP_N = 25
+TRACEMALLOC_FRAMES = 5
+
+_capture_lock = threading.Lock()
+
+
+@dataclass
+class ProfileReport:
+    prof_path: str = ""
+    alloc_path: str = ""
+    wall_ms: float = 0.0
+    peak_mb: float = 0.0
+    functions: list[dict] = field(default_factory=list)  # top cumulative-time functions
+    allocations: list[dict] = field(default_factory=list)  # top allocation sites
+    busy: bool = False  # another capture was running, nothing was recorded
+
+
+def _top_functions(profiler: cProfile.Profile, top_n: int) -> list[dict]:
+    stats = pstats.Stats(profiler).stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:top_n]
+    return [
+        {
+            "function": f"{os.path.basename(filename)}:{line}({name})",
+            "calls": calls,
+            "tottime_ms": round(tottime * 1000, 2),
+            "cumtime_ms": round(cumtime * 1000, 2),
+        }
+        for (filename, line, name), (_, calls, tottime, cumtime, _) in ranked
+    ]
+
+
+def _top_allocations(snapshot: tracemalloc.Snapshot, top_n: int) -> list[dict]:
+    snapshot = snapshot.filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ])
+    return [
+        {
+            "site": f"{os.path.basename(stat.traceback[0].filename)}:{stat.traceback[0].lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count,
+        }
+        for stat in snapshot.statistics("lineno")[:top_n]
+    ]
+
+
+@contextmanager
+def capture(output_dir: str, top_n: int = DEFAULT_TOP_N):
+    """Profile the enclosed block; yields a ProfileReport that is filled in on exit (also on exceptions)."""
+    report = ProfileReport()
+    if not _capture_lock.acquire(blocking=False):
+        report.busy = True
+        yield report
+        return
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        tracemalloc.reset_peak()
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            report.wall_ms = round((time.perf_counter() - started) * 1000, 1)
+            report.peak_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+            snapshot = tracemalloc.take_snapshot()
+            if started_tracing:
+                tracemalloc.stop()
+
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+            report.prof_path = os.path.join(output_dir, f"{stamp}.prof")
+            report.alloc_path = os.path.join(output_dir, f"{stamp}.alloc.txt")
+            profiler.dump_stats(report.prof_path)
+            report.functions = _top_functions(profiler, top_n)
+            report.allocations = _top_allocations(snapshot, top_n)
+            with open(report.alloc_path, "w") as f:
+                f.write(f"wall {report.wall_ms} ms, peak traced {report.peak_mb} MB\n")
+                for allocation in report.allocations:
+                    f.write(f"{allocation['size_kb']:>10} KB {allocation['count']:>8} blocks  {allocation['site']}\n")
+    finally:
+        _capture_lock.release()
@@ -0,0 +1,138 @@
+"""Background uploads of originals to remote storage (Cloudinary).
+
+save_photo stores the original in the blob store, inserts the row with
+storage_state 'processing' and hands the photo here; the user's click returns
+without waiting on the network. Uploads run on a small worker pool and are
+retried with exponential backoff. On success the row switches to the remote
+URL and the local original is released; after the last attempt it is marked
+'failed' and keeps being served locally. Rows left 'processing' or 'failed'
+by an earlier process are queued again when the worker starts.
+"""
+
+import random
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+DEFAULT_WORKERS = 2
+DEFAULT_MAX_ATTEMPTS = 5
+DEFAULT_BACKOFF_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 60.0
+
+_instances: dict[str, "RemoteUploader"] = {}
+_instances_lock = threading.Lock()
+
+
+def open_remote_uploader(storage, blob_store, upload, **options) -> "RemoteUploader":
+    """Return the process-wide RemoteUploader for a storage engine, creating (and requeuing) on first use."""
+    with _instances_lock:
+        uploader = _instances.get(storage.db_path)
+        if uploader is None:
+            uploader = RemoteUploader(storage, blob_store, upload, **options)
+            _instances[storage.db_path] = uploader
+            uploader.requeue()
+        return uploader
+
+
+class RemoteUploader:
+    def __init__(
+        self,
+        storage,
+        blob_store,
+        upload,
+        discard=None,
+        on_uploaded=None,
+        write=None,
+        workers: int = DEFAULT_WORKERS,
+        max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+        backoff_seconds: float = DEFAULT_BACKOFF_SECONDS,
+    ) -> None:
+        """upload(photo_id, data) returns the remote URL or raises.
+
+        discard(photo_id) removes a remote copy whose photo was deleted while it
+        uploaded; on_uploaded(photo_id) runs after a photo switched to remote.
+        write(fn, *args) applies a storage mutation and returns its result; it
+        defaults to calling fn on the worker thread.
+        """
+        self.storage = storage
+        self.blob_store = blob_store
+        self._upload = upload
+        self._discard = discard
+        self._on_uploaded = on_uploaded
+        self._write = write or (lambda fn, *args: fn(*args))
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="remote-upload")
+        self._lock = threading.Lock()
+        self._queued: dict[str, Future] = {}
+        self._counters = {"uploaded": 0, "retries": 0, "failed": 0}
+
+    def submit(self, photo_id: str) -> Future:
+        """Queue a photo whose original is in the blob store; a photo already queued is not queued twice."""
+        with self._lock:
+            future = self._queued.get(photo_id)
+            if future is None:
+                future = self._executor.submit(self._run, photo_id)
+                self._queued[photo_id] = future
+            return future
+
+    def requeue(self) -> int:
+        """Queue every photo still waiting for (or that gave up on) its remote upload."""
+        pending = self.storage.photos_in_storage_state("processing", "failed")
+        for photo_id in pending["photo_id"]:
+            self.submit(photo_id)
+        return len(pending)
+
+    def _run(self, photo_id: str) -> str | None:
+        try:
+            return self._upload_with_retries(photo_id)
+        finally:
+            with self._lock:
+                self._queued.pop(photo_id, None)
+
+    def _upload_with_retries(self, photo_id: str) -> str | None:
+        photo = self.storage.get_photo(photo_id)
+        if photo is None:
+            return None
+        data = self.blob_store.get(photo.get("image_sha256"))
+        if data is None:
+            # Nothing local left to upload
+            self._write(self.storage.set_storage_state, photo_id, "failed")
+            self._count("failed")
+            return None
+        self._write(self.storage.set_storage_state, photo_id, "processing")
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                url = self._upload(photo_id, data)
+                break
+            except Exception:
+                if attempt == self.max_attempts:
+                    self._write(self.storage.set_storage_state, photo_id, "failed")
+                    self._count("failed")
+                    return None
+                self._count("retries")
+                # Exponential backoff with jitter so retries from several workers spread out
+                delay = min(MAX_BACKOFF_SECONDS, self.backoff_seconds * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+
+        replaced = self._write(self.storage.set_remote_url, photo_id, url)
+        if replaced is None:
+            # Deleted while uploading
+            if self._discard is not None:
+                self._discard(photo_id)
+            return None
+        if replaced and not self.storage.image_in_use(replaced):
+            self.blob_store.delete(replaced)
+        self._count("uploaded")
+        if self._on_uploaded is not None:
+            self._on_uploaded(photo_id)
+        return url
+
+    def _count(self, name: str) -> None:
+        with self._lock:
+            self._counters[name] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._counters, "queued": len(self._queued)}
@@ -0,0 +1,54 @@
+"""Fixed set of downscaled image renditions generated once at upload time.
+
+Gallery views ask for the smallest rendition that fits their slot instead of
+decoding and shipping the full-resolution upload on every rerun.
+"""
+
+import io
+
+# name -> longest edge in pixels, smallest first
+RENDITIONS = {
+    "thumb": 400,  # 3-across grid
+    "card": 800,  # 2-across moderation cards
+    "full": 1600,  # single photo view
+}
+RENDITION_QUALITY = 82
+
+
+def column(name: str) -> str:
+    """photos table column holding the blob key of a rendition."""
+    return f"{name}_sha256"
+
+
+COLUMNS = [column(name) for name in RENDITIONS]
+
+
+def pick(slot_px: int) -> str:
+    """Smallest rendition at least slot_px wide (the largest if none is)."""
+    for name, size in RENDITIONS.items():
+        if size >= slot_px:
+            return name
+    return next(reversed(RENDITIONS))
+
+
+def render(image: "Image.Image", encoded_source: bytes | None = None) -> dict[str, bytes]:
+    """Encode every rendition of an RGB image as JPEG bytes.
+
+    encoded_source, if given, is the image already encoded as JPEG; renditions the
+    image fits inside reuse those bytes instead of encoding the same pixels again.
+    """
+    from PIL import Image
+
+    encoded = {}
+    current = image
+    # Largest first, each one downscaled from the previous to keep resampling cheap
+    for name, size in reversed(RENDITIONS.items()):
+        if encoded_source is not None and max(current.size) <= size:
+            encoded[name] = encoded_source
+            continue
+        current = current.copy()
+        current.thumbnail((size, size), Image.LANCZOS)
+        buffer = io.BytesIO()
+        current.save(buffer, format="JPEG", quality=RENDITION_QUALITY, optimize=True, progressive=True)
+        encoded[name] = buffer.getvalue()
+    return encoded
@@ -0,0 +1,171 @@
+"""Immutable results snapshot taken when voting ends.
+
+Once voting has ended the contest data is frozen, so the final standings are
+computed once and written to a JSON file: overall rank, rank within the
+theme, vote count and uploader name for every approved photo. Each snapshot
+gets a version one higher than any earlier snapshot of the data directory
+(the current file or an archived one). Results-phase reruns read the parsed
+file, which every session shares through snapshot_cache until the file
+changes, so they never aggregate votes. Resetting the contest moves the file
+into the archive directory next to it.
+"""
+
+import json
+import os
+import re
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import pandas as pd
+
+import perf
+import snapshot_cache
+
+SCHEMA_VERSION = 1
+ARCHIVE_DIRNAME = "results_archive"
+LEADERBOARD_COLUMNS = ["rank", "title", "theme", "theme_rank", "uploader_name", "votes"]
+
+# Bumped by write()/archive() so a change within one mtime tick is still noticed in this process
+_generation = 0
+# Reentrant: load_or_write() writes while holding it
+_lock = threading.RLock()
+
+
+@dataclass(frozen=True, eq=False)
+class ResultsSnapshot:
+    version: int
+    created_at: str
+    total_votes: int
+    # One row per approved photo in final order: rank, theme_rank, photo_id, title, theme,
+    # uploader (employee ID), uploader_name, votes
+    entries: pd.DataFrame = field(repr=False)
+
+    def leaderboard(self, show_uploader: bool = False) -> pd.DataFrame:
+        """The table shown on the results page; uploader is the uploader's name."""
+        columns = LEADERBOARD_COLUMNS if show_uploader else [c for c in LEADERBOARD_COLUMNS if c != "uploader_name"]
+        return self.entries[columns].rename(columns={"uploader_name": "uploader"})
+
+
+def archive_dir(path: str) -> str:
+    return os.path.join(os.path.dirname(path), ARCHIVE_DIRNAME)
+
+
+def _entries(rows: list[dict]) -> list[dict]:
+    """Number rows (already in final order) overall and within their theme."""
+    theme_positions: dict[str, int] = {}
+    entries = []
+    for rank, row in enumerate(rows, start=1):
+        theme = row.get("theme")
+        theme_rank = None
+        if theme:
+            theme_rank = theme_positions[theme] = theme_positions.get(theme, 0) + 1
+        entries.append({
+            "rank": rank,
+            "theme_rank": theme_rank,
+            "photo_id": row["photo_id"],
+            "title": row.get("title") or "",
+            "theme": theme or None,
+            "uploader": row.get("uploader") or "",
+            "uploader_name": row.get("uploader_name") or row.get("uploader") or "",
+            "votes": int(row["votes"]),
+        })
+    return entries
+
+
+def _next_version(path: str) -> int:
+    versions = [0]
+    current = _read(path)
+    if current is not None:
+        versions.append(current.version)
+    try:
+        names = os.listdir(archive_dir(path))
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        match = re.match(r"results-v(\d+)-", name)
+        if match:
+            versions.append(int(match.group(1)))
+    return max(versions) + 1
+
+
+def _read(path: str) -> ResultsSnapshot | None:
+    try:
+        with perf.span("results.read"), open(path, "r") as f:
+            payload = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if payload.get("schema") != SCHEMA_VERSION:
+        return None
+    entries = pd.DataFrame(
+        payload["entries"],
+        columns=["rank", "theme_rank", "photo_id", "title", "theme", "uploader", "uploader_name", "votes"],
+    )
+    entries["theme_rank"] = entries["theme_rank"].astype("Int64")
+    return ResultsSnapshot(
+        version=payload["version"],
+        created_at=payload["created_at"],
+        total_votes=payload["total_votes"],
+        entries=entries,
+    )
+
+
+def load(path: str) -> ResultsSnapshot | None:
+    """The current snapshot, re-read only when the file changed; None if there is none."""
+    return snapshot_cache.get("results", [path], lambda: _read(path), generation=lambda: _generation)
+
+
+def write(path: str, rows: list[dict]) -> ResultsSnapshot:
+    """Write a new snapshot from rows in final order (photo_id, title, theme, uploader, uploader_name, votes).
+
+    The file is replaced atomically (temp file + rename), so readers see either
+    the previous snapshot or the complete new one.
+    """
+    global _generation
+    with _lock:
+        entries = _entries(rows)
+        payload = {
+            "schema": SCHEMA_VERSION,
+            "version": _next_version(path),
+            "created_at": datetime.utcnow().isoformat(),
+            "total_votes": sum(entry["votes"] for entry in entries),
+            "entries": entries,
+        }
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with perf.span("results.write"), open(tmp_path, "w") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
+        _generation += 1
+    return load(path)
+
+
+def load_or_write(path: str, rows) -> ResultsSnapshot:
+    """The current snapshot, writing one from rows() first if there is none yet."""
+    snapshot = load(path)
+    if snapshot is not None:
+        return snapshot
+    with _lock:
+        snapshot = _read(path)
+        if snapshot is not None:
+            return snapshot
+        return write(path, rows())
+
+
+def archive(path: str) -> str | None:
+    """Move the current snapshot into the archive directory; returns its new path, or None if there was none."""
+    global _generation
+    with _lock:
+        snapshot = _read(path)
+        if snapshot is None:
+            if os.path.exists(path):
+                os.remove(path)  # unreadable or from an older schema
+                _generation += 1
+            return None
+        os.makedirs(archive_dir(path), exist_ok=True)
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        target = os.path.join(archive_dir(path), f"results-v{snapshot.version}-{stamp}.json")
+        os.replace(path, target)
+        _generation += 1
+    return target
@@ -0,0 +1,88 @@
+"""Process-wide snapshot cache for frames loaded from disk.
+
+Each entry is validated by a token built from (path, mtime_ns, size) of the
+files it was read from plus an in-process write generation. When nothing has
+changed, every session and every call in a rerun shares one parsed frame.
+Callers get shallow Copy-on-Write copies, so mutating a returned frame never
+reaches the cached one. Copy-on-Write is always on from pandas 3; on pandas 2
+the app turns it on at start-up (enable_copy_on_write), and without it callers
+get deep copies instead.
+"""
+
+import os
+import threading
+
+import pandas as pd
+
+import perf
+
+PANDAS_3 = int(pd.__version__.split(".")[0]) >= 3
+
+_lock = threading.Lock()
+_entries: dict[tuple, tuple[tuple, object]] = {}
+_counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+
+def _stat(path: str) -> tuple[str, int, int]:
+    try:
+        st = os.stat(path)
+        return (path, st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        return (path, 0, -1)
+
+
+def enable_copy_on_write() -> None:
+    """Turn on pandas Copy-on-Write for the whole process (a no-op on pandas 3, where it is always on).
+
+    This changes pandas semantics for every caller in the process, so it is left
+    to the application to call once at start-up rather than done on import.
+    """
+    if not PANDAS_3:
+        pd.set_option("mode.copy_on_write", True)
+
+
+def _copy_on_write() -> bool:
+    return PANDAS_3 or pd.get_option("mode.copy_on_write") is True
+
+
+def _readonly(value):
+    if isinstance(value, pd.DataFrame):
+        # A shallow copy only isolates the cached frame under Copy-on-Write
+        return value.copy(deep=not _copy_on_write())
+    return value
+
+
+def get(name: str, paths: list[str], loader, generation=lambda: 0):
+    """Return the cached value for name, reloading it with loader() if any file or the generation changed.
+
+    generation is a callable returning the in-process write counter of the data.
+    File stats are taken before loading, so a write racing the load changes them and
+    forces a reload next time; the generation is read after loading, so a loader that
+    itself catches up on pending changes doesn't invalidate its own result.
+    """
+    key = (name, tuple(paths))
+    stats = tuple(_stat(path) for path in paths)
+    with _lock:
+        entry = _entries.get(key)
+        if entry is not None and entry[0] == (generation(),) + stats:
+            _counters["hits"] += 1
+            return _readonly(entry[1])
+        _counters["misses"] += 1
+    with perf.span(f"load.{name}"):
+        value = loader()
+    with _lock:
+        _entries[key] = ((generation(),) + stats, value)
+    return _readonly(value)
+
+
+def invalidate(name: str | None = None) -> None:
+    """Drop one named entry (for every path set) or, with no name, everything."""
+    with _lock:
+        for key in [key for key in _entries if name is None or key[0] == name]:
+            del _entries[key]
+            _counters["invalidations"] += 1
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_counters, "entries": len(_entries)}
@@ -0,0 +1,93 @@
+"""Once-per-process initialization and a cold-start timing report.
+
+Streamlit re-executes app.py on every rerun, so setup that must happen once
+per server process (folders and migrations, background workers, the
+Cloudinary client, the secrets check) goes through once(): the first caller
+runs the step, later callers get its result for a dictionary lookup. A step
+that raises is not marked done and is retried by the next caller.
+
+Step durations are kept for report(), together with the first rerun's time
+and how long the process had been up when that rerun finished. The app only
+reports a rerun that got through its initialization, so a rerun stopped
+before it (e.g. by the rules prompt) is not taken for the cold start.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+# Modules the app imports only on first use; the report shows which are loaded
+DEFERRED_MODULES = ("cloudinary", "PIL.Image", "requests")
+
+_results: dict[str, object] = {}
+_steps: dict[str, float] = {}
+_first_rerun: dict | None = None
+# Reentrant: a step may itself call once() for another step
+_lock = threading.RLock()
+
+
+def once(name: str, fn):
+    """Run fn the first time name is requested in this process; return its (cached) result."""
+    try:
+        return _results[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _results:
+            started = time.perf_counter()
+            result = fn()
+            _steps[name] = round((time.perf_counter() - started) * 1000, 3)
+            _results[name] = result
+        return _results[name]
+
+
+def done(name: str) -> bool:
+    """Whether the step has completed in this process."""
+    return name in _results
+
+
+def process_age_seconds() -> float | None:
+    """Seconds since this process started (from /proc on Linux), or None where unavailable."""
+    try:
+        with open("/proc/self/stat") as f:
+            # Fields after the parenthesised command name start at field 3; starttime is field 22
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def finish_first_rerun(started: float, report_path: str | None = None) -> None:
+    """Record the first rerun of the process (started is a perf_counter value); later calls are ignored."""
+    global _first_rerun
+    if _first_rerun is not None:
+        return
+    with _lock:
+        if _first_rerun is not None:
+            return
+        age = process_age_seconds()
+        _first_rerun = {
+            "first_rerun_ms": round((time.perf_counter() - started) * 1000, 3),
+            "process_age_ms": round(age * 1000, 1) if age is not None else None,
+        }
+    if report_path:
+        os.makedirs(os.path.dirname(report_path), exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(report(), f, indent=2)
+
+
+def report() -> dict:
+    """Cold-start timings: first rerun, process age when it finished, each once() step, deferred imports."""
+    with _lock:
+        first_rerun = dict(_first_rerun or {})
+        steps = dict(_steps)
+    return {
+        "first_rerun_ms": first_rerun.get("first_rerun_ms"),
+        "process_age_at_first_rerun_ms": first_rerun.get("process_age_ms"),
+        "steps_ms": steps,
+        "loaded_modules": {name: name in sys.modules for name in DEFERRED_MODULES},
+    }
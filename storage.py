@@ -0,0 +1,607 @@
+"""SQLite storage engine for contest photos, ratings and users.
+
+All mutations are row-level statements against indexed tables, so a vote is a
+single upsert instead of a rewrite of the whole ratings file. The database runs
+in WAL mode so Streamlit script threads can keep reading while one writes.
+CSV files remain supported as an import/export format.
+"""
+
+import base64
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+
+import perf
+
+
+PHOTO_COLUMNS = [
+    "photo_id",
+    "title",
+    "filename",
+    "uploader",
+    "uploaded_at",
+    "cloudinary_url",
+    "image_sha256",
+    "status",
+    "rejection_reason",
+    "theme",
+    "thumb_sha256",
+    "card_sha256",
+    "full_sha256",
+    "storage_state",
+]
+RATING_COLUMNS = ["photo_id", "user_id", "rating"]
+USER_COLUMNS = ["employee_id", "name", "posting_details", "is_admin"]
+
+# Low-cardinality photo columns are handed out as categoricals (integer codes plus a
+# small dictionary) instead of one Python string per row
+PHOTO_STATUSES = ["pending", "approved", "rejected"]
+STORAGE_STATES = ["local", "processing", "failed", "remote"]
+
+# Schema migrations, applied in order and tracked with PRAGMA user_version
+MIGRATIONS = [
+    """
+    CREATE TABLE IF NOT EXISTS photos (
+        photo_id TEXT PRIMARY KEY,
+        title TEXT,
+        filename TEXT,
+        uploader TEXT,
+        uploaded_at TEXT,
+        cloudinary_url TEXT,
+        image_base64 TEXT,
+        status TEXT NOT NULL DEFAULT 'pending',
+        rejection_reason TEXT,
+        theme TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_photos_uploader ON photos(uploader);
+    CREATE INDEX IF NOT EXISTS idx_photos_status ON photos(status);
+
+    -- One vote per user overall, so user_id is the key and moving a vote is an upsert
+    CREATE TABLE IF NOT EXISTS ratings (
+        user_id TEXT PRIMARY KEY,
+        photo_id TEXT NOT NULL,
+        rating INTEGER NOT NULL DEFAULT 1
+    );
+    CREATE INDEX IF NOT EXISTS idx_ratings_photo ON ratings(photo_id);
+
+    CREATE TABLE IF NOT EXISTS users (
+        employee_id TEXT PRIMARY KEY,
+        name TEXT,
+        posting_details TEXT,
+        is_admin INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """,
+    # Image bytes move out of the table into the content-addressed blob store;
+    # image_base64 stays only until migrate_base64_to_blobs has emptied it
+    """
+    ALTER TABLE photos ADD COLUMN image_sha256 TEXT;
+    CREATE INDEX IF NOT EXISTS idx_photos_image ON photos(image_sha256);
+    """,
+    # Blob keys of the downscaled renditions (see renditions.py)
+    """
+    ALTER TABLE photos ADD COLUMN thumb_sha256 TEXT;
+    ALTER TABLE photos ADD COLUMN card_sha256 TEXT;
+    ALTER TABLE photos ADD COLUMN full_sha256 TEXT;
+    """,
+    # Where the original lives: 'local' (blob store), 'processing' (remote upload queued),
+    # 'failed' (remote upload gave up, served locally) or 'remote' (cloudinary_url)
+    """
+    ALTER TABLE photos ADD COLUMN storage_state TEXT;
+    UPDATE photos SET storage_state = CASE WHEN cloudinary_url IS NOT NULL THEN 'remote' ELSE 'local' END;
+    CREATE INDEX IF NOT EXISTS idx_photos_storage_state ON photos(storage_state);
+    """,
+    # IDs and statuses are normalized when written (see normalize_id), so readers compare
+    # them directly instead of upper/lower-casing whole columns on every read
+    """
+    UPDATE photos SET uploader = UPPER(TRIM(uploader)) WHERE uploader != UPPER(TRIM(uploader));
+    UPDATE photos SET status = LOWER(TRIM(status)) WHERE status != LOWER(TRIM(status));
+    UPDATE photos SET status = 'approved' WHERE status = '';
+    UPDATE OR REPLACE ratings SET user_id = UPPER(TRIM(user_id)) WHERE user_id != UPPER(TRIM(user_id));
+    """,
+    # Counter bumped by every change to the users table, from any connection or process;
+    # user_directory uses it to tell its own writes from anyone else's
+    """
+    INSERT OR IGNORE INTO meta (key, value) VALUES ('users_version', '0');
+    CREATE TRIGGER IF NOT EXISTS users_version_insert AFTER INSERT ON users BEGIN
+        UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'users_version';
+    END;
+    CREATE TRIGGER IF NOT EXISTS users_version_update AFTER UPDATE ON users BEGIN
+        UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'users_version';
+    END;
+    CREATE TRIGGER IF NOT EXISTS users_version_delete AFTER DELETE ON users BEGIN
+        UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'users_version';
+    END;
+    """,
+]
+
+# Rows are read from legacy CSVs in chunks so base64 images never all sit in memory
+CSV_CHUNK_ROWS = 200
+
+_instances: dict[str, "Storage"] = {}
+_instances_lock = threading.Lock()
+
+
+def open_storage(db_path: str) -> "Storage":
+    """Return the process-wide Storage for db_path, creating it on first use."""
+    db_path = os.path.abspath(db_path)
+    with _instances_lock:
+        storage = _instances.get(db_path)
+        if storage is None:
+            storage = Storage(db_path)
+            _instances[db_path] = storage
+        return storage
+
+
+def _none_if_nan(value):
+    """Convert pandas missing values to None so SQLite stores NULL."""
+    if value is None:
+        return None
+    try:
+        if pd.isna(value):
+            return None
+    except (TypeError, ValueError):
+        pass
+    return value
+
+
+def normalize_id(value) -> str | None:
+    """Employee IDs (uploader, user_id, employee_id) are stored trimmed and upper-cased."""
+    value = _none_if_nan(value)
+    return str(value).strip().upper() if value is not None else None
+
+
+def _typed_photos(df: pd.DataFrame) -> pd.DataFrame:
+    df["status"] = pd.Categorical(df["status"], categories=PHOTO_STATUSES)
+    df["storage_state"] = pd.Categorical(df["storage_state"], categories=STORAGE_STATES)
+    df["theme"] = df["theme"].astype("category")
+    return df
+
+
+def _atomic_to_csv(df: pd.DataFrame, path: str) -> None:
+    """Write a CSV next to path and rename it over the target in one step."""
+    tmp_path = f"{path}.tmp"
+    with perf.span("csv.write") as span:
+        df.to_csv(tmp_path, index=False)
+        span.add_bytes(os.path.getsize(tmp_path))
+    os.replace(tmp_path, path)
+
+
+class Storage:
+    """Thread-safe SQLite backend. Each thread gets its own connection."""
+
+    def __init__(self, db_path: str) -> None:
+        self.db_path = db_path
+        self._local = threading.local()
+        # Bumped on every commit from this process, so caches can spot writes within one mtime tick
+        self.generation = 0
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._migrate()
+
+    # Connections and transactions
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: transactions are opened explicitly in transaction()
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run a block as one write transaction; yields the connection."""
+        conn = self._connection()
+        if conn.in_transaction:
+            # Nested use joins the outer transaction
+            yield conn
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        self.generation += 1
+
+    def _migrate(self) -> None:
+        with self.transaction() as conn:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            for index, script in enumerate(MIGRATIONS[version:], start=version + 1):
+                statement = ""
+                # Split on ";" but keep trigger bodies (BEGIN ...; END) in one statement
+                for part in script.split(";"):
+                    statement += part + ";"
+                    if sqlite3.complete_statement(statement):
+                        if statement.strip(" \n;"):
+                            conn.execute(statement)
+                        statement = ""
+                conn.execute(f"PRAGMA user_version={index}")
+
+    def _frame(self, query: str, columns: list[str], params: tuple = ()) -> pd.DataFrame:
+        rows = self._connection().execute(query, params).fetchall()
+        return pd.DataFrame([tuple(row) for row in rows], columns=columns)
+
+    # Meta
+
+    def get_meta(self, key: str, default: str | None = None) -> str | None:
+        row = self._connection().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key: str, value: str | None) -> None:
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value),
+            )
+
+    # Photos
+
+    def photos_frame(self) -> pd.DataFrame:
+        """All photos in upload order (status, theme and storage_state as categoricals)."""
+        return _typed_photos(self._frame(
+            f"SELECT {', '.join(PHOTO_COLUMNS)} FROM photos ORDER BY rowid", PHOTO_COLUMNS
+        ))
+
+    def get_photo(self, photo_id: str) -> dict | None:
+        row = self._connection().execute(
+            f"SELECT {', '.join(PHOTO_COLUMNS)} FROM photos WHERE photo_id = ?", (photo_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def photo_exists(self, photo_id: str) -> bool:
+        row = self._connection().execute(
+            "SELECT 1 FROM photos WHERE photo_id = ?", (photo_id,)
+        ).fetchone()
+        return row is not None
+
+    def insert_photo(self, photo: dict) -> None:
+        photo = {**photo, "uploader": normalize_id(photo.get("uploader"))}
+        values = [_none_if_nan(photo.get(column)) for column in PHOTO_COLUMNS]
+        with self.transaction() as conn:
+            conn.execute(
+                f"INSERT INTO photos ({', '.join(PHOTO_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(PHOTO_COLUMNS))})",
+                values,
+            )
+
+    def set_photo_status(self, photo_id: str, status: str, reason: str | None = None) -> bool:
+        """Update moderation status of one photo. Returns False if it does not exist."""
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE photos SET status = ?, rejection_reason = ? WHERE photo_id = ?",
+                (status, reason, photo_id),
+            )
+        return cursor.rowcount > 0
+
+    def bulk_set_status(self, photo_ids: list[str], status: str, reason: str | None = None) -> int:
+        """Update moderation status of many photos in one transaction. Returns photos updated."""
+        with self.transaction() as conn:
+            cursor = conn.executemany(
+                "UPDATE photos SET status = ?, rejection_reason = ? WHERE photo_id = ?",
+                [(status, reason, photo_id) for photo_id in photo_ids],
+            )
+        return cursor.rowcount
+
+    def delete_photo(self, photo_id: str) -> dict | None:
+        """Delete a photo and its ratings. Returns the deleted row, if any."""
+        with self.transaction() as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(PHOTO_COLUMNS)} FROM photos WHERE photo_id = ?", (photo_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM ratings WHERE photo_id = ?", (photo_id,))
+            conn.execute("DELETE FROM photos WHERE photo_id = ?", (photo_id,))
+        return dict(row)
+
+    def count_active_photos(self, uploader: str) -> int:
+        """Count non-rejected photos uploaded by an employee."""
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM photos WHERE uploader = ? AND status != 'rejected'",
+            (normalize_id(uploader),),
+        ).fetchone()
+        return row[0]
+
+    def image_in_use(self, key: str) -> bool:
+        """Whether any photo still references this blob, as original or rendition."""
+        row = self._connection().execute(
+            "SELECT 1 FROM photos WHERE image_sha256 = ?1 OR thumb_sha256 = ?1 "
+            "OR card_sha256 = ?1 OR full_sha256 = ?1 LIMIT 1",
+            (key,),
+        ).fetchone()
+        return row is not None
+
+    def set_renditions(self, photo_id: str, keys: dict[str, str]) -> None:
+        """Store rendition blob keys, given as {column: key}."""
+        columns = [column for column in keys if column in PHOTO_COLUMNS]
+        if not columns:
+            return
+        with self.transaction() as conn:
+            conn.execute(
+                f"UPDATE photos SET {', '.join(f'{column} = ?' for column in columns)} WHERE photo_id = ?",
+                [keys[column] for column in columns] + [photo_id],
+            )
+
+    def set_storage_state(self, photo_id: str, state: str) -> bool:
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE photos SET storage_state = ? WHERE photo_id = ?", (state, photo_id)
+            )
+        return cursor.rowcount > 0
+
+    def set_remote_url(self, photo_id: str, url: str) -> str | None:
+        """Switch a photo to its uploaded remote copy, dropping the local original.
+
+        Returns the blob key of the local original it replaced ("" if there was none),
+        or None if the photo no longer exists.
+        """
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT image_sha256 FROM photos WHERE photo_id = ?", (photo_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE photos SET cloudinary_url = ?, storage_state = 'remote', image_sha256 = NULL "
+                "WHERE photo_id = ?",
+                (url, photo_id),
+            )
+        return row["image_sha256"] or ""
+
+    def photos_in_storage_state(self, *states: str) -> pd.DataFrame:
+        return _typed_photos(self._frame(
+            f"SELECT {', '.join(PHOTO_COLUMNS)} FROM photos "
+            f"WHERE storage_state IN ({', '.join('?' * len(states))}) ORDER BY rowid",
+            PHOTO_COLUMNS,
+            states,
+        ))
+
+    def photos_missing_renditions(self) -> pd.DataFrame:
+        return _typed_photos(self._frame(
+            f"SELECT {', '.join(PHOTO_COLUMNS)} FROM photos "
+            "WHERE thumb_sha256 IS NULL OR card_sha256 IS NULL OR full_sha256 IS NULL ORDER BY rowid",
+            PHOTO_COLUMNS,
+        ))
+
+    def migrate_base64_to_blobs(self, blob_store, batch_size: int = 50) -> int:
+        """Move legacy image_base64 values into the blob store, a batch at a time."""
+        moved = 0
+        while True:
+            rows = self._connection().execute(
+                "SELECT rowid, image_base64 FROM photos WHERE image_base64 IS NOT NULL LIMIT ?",
+                (batch_size,),
+            ).fetchall()
+            if not rows:
+                return moved
+            with self.transaction() as conn:
+                for rowid, image_base64 in rows:
+                    key = _put_base64(blob_store, image_base64)
+                    conn.execute(
+                        "UPDATE photos SET image_sha256 = COALESCE(?, image_sha256), image_base64 = NULL "
+                        "WHERE rowid = ?",
+                        (key, rowid),
+                    )
+            moved += len(rows)
+
+    # Ratings
+
+    def ratings_frame(self) -> pd.DataFrame:
+        return self._frame(
+            f"SELECT {', '.join(RATING_COLUMNS)} FROM ratings ORDER BY rowid", RATING_COLUMNS
+        )
+
+    def upsert_rating(self, photo_id: str, user_id: str, rating: int, check_photo: bool = True) -> bool:
+        """Record a user's single vote, moving it if one exists.
+
+        Returns False for unknown photos unless check_photo is False (used when
+        replaying the vote journal, whose drop records clean up deleted photos).
+        """
+        with self.transaction() as conn:
+            cursor = conn.execute(
+                "INSERT INTO ratings (user_id, photo_id, rating) "
+                "SELECT ?, ?, ? WHERE ? OR EXISTS (SELECT 1 FROM photos WHERE photo_id = ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET photo_id = excluded.photo_id, rating = excluded.rating",
+                (normalize_id(user_id), photo_id, rating, not check_photo, photo_id),
+            )
+        return cursor.rowcount > 0
+
+    def delete_photo_ratings(self, photo_id: str) -> None:
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM ratings WHERE photo_id = ?", (photo_id,))
+
+    # Users
+
+    def users_frame(self) -> pd.DataFrame:
+        df = self._frame(
+            f"SELECT {', '.join(USER_COLUMNS)} FROM users ORDER BY rowid", USER_COLUMNS
+        )
+        df["is_admin"] = df["is_admin"].astype(bool)
+        return df
+
+    def get_user(self, employee_id: str) -> dict | None:
+        row = self._connection().execute(
+            f"SELECT {', '.join(USER_COLUMNS)} FROM users WHERE employee_id = ?",
+            (normalize_id(employee_id),),
+        ).fetchone()
+        if row is None:
+            return None
+        user = dict(row)
+        user["is_admin"] = bool(user["is_admin"])
+        return user
+
+    def users_version(self) -> int:
+        """Counter bumped by every change to the users table (see the users_version triggers)."""
+        return int(self.get_meta("users_version", "0"))
+
+    def upsert_user(self, user: dict) -> int:
+        """Insert a user or update name/posting details of an existing one; returns the new users_version."""
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO users (employee_id, name, posting_details, is_admin) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(employee_id) DO UPDATE SET "
+                "name = excluded.name, posting_details = excluded.posting_details",
+                (
+                    normalize_id(user["employee_id"]),
+                    _none_if_nan(user.get("name")),
+                    _none_if_nan(user.get("posting_details")),
+                    int(bool(user.get("is_admin", False))),
+                ),
+            )
+            return int(conn.execute("SELECT value FROM meta WHERE key = 'users_version'").fetchone()[0])
+
+    # CSV import / export
+
+    def is_empty(self) -> bool:
+        conn = self._connection()
+        return all(
+            conn.execute(f"SELECT NOT EXISTS (SELECT 1 FROM {table})").fetchone()[0]
+            for table in ("photos", "ratings", "users")
+        )
+
+    def import_csv(self, photos_csv: str, ratings_csv: str, users_csv: str, blob_store=None) -> dict:
+        """Load legacy CSV files into the database, replacing rows with the same key.
+
+        Photos are streamed in chunks; with a blob_store, any image_base64 values are
+        moved into it on the way in and only their digest is stored.
+        """
+        photo_count = 0
+        for photos_df in _iter_csv(photos_csv, PHOTO_COLUMNS + ["image_base64"]):
+            # Same backward-compatibility defaults load_data applied to old CSVs
+            photos_df["status"] = (
+                photos_df["status"].fillna("approved").astype(str).str.strip().str.lower().replace("", "approved")
+            )
+            photos_df["storage_state"] = photos_df["storage_state"].fillna(
+                photos_df["cloudinary_url"].notna().map({True: "remote", False: "local"})
+            )
+            photos_df["uploader"] = photos_df["uploader"].map(normalize_id)
+            if blob_store is not None:
+                photos_df["image_sha256"] = [
+                    _put_base64(blob_store, encoded) or _none_if_nan(key)
+                    for encoded, key in zip(photos_df["image_base64"], photos_df["image_sha256"])
+                ]
+                photos_df["image_base64"] = None
+            columns = PHOTO_COLUMNS + ["image_base64"]
+            with self.transaction() as conn:
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO photos ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    (
+                        [_none_if_nan(row[column]) for column in columns]
+                        for row in photos_df.to_dict("records")
+                    ),
+                )
+            photo_count += len(photos_df)
+
+        ratings_df = _read_csv(ratings_csv, RATING_COLUMNS)
+        users_df = _read_csv(users_csv, USER_COLUMNS)
+        with self.transaction() as conn:
+            # Later rows win, matching the old "drop previous vote, append new" behaviour
+            conn.executemany(
+                "INSERT OR REPLACE INTO ratings (user_id, photo_id, rating) VALUES (?, ?, ?)",
+                (
+                    (normalize_id(row["user_id"]), str(row["photo_id"]), int(_none_if_nan(row["rating"]) or 1))
+                    for row in ratings_df.to_dict("records")
+                    if _none_if_nan(row["user_id"]) is not None
+                ),
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO users (employee_id, name, posting_details, is_admin) "
+                "VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        normalize_id(row["employee_id"]),
+                        _none_if_nan(row["name"]),
+                        _none_if_nan(row["posting_details"]),
+                        int(str(row["is_admin"]).strip().lower() in ("true", "1")),
+                    )
+                    for row in users_df.to_dict("records")
+                    if _none_if_nan(row["employee_id"]) is not None
+                ),
+            )
+        return {"photos": photo_count, "ratings": len(ratings_df), "users": len(users_df)}
+
+    def export_csv(self, photos_csv: str, ratings_csv: str, users_csv: str) -> dict:
+        """Write the database out as CSV files (each replaced atomically)."""
+        photos_df = self.photos_frame()
+        ratings_df = self.ratings_frame()
+        users_df = self.users_frame()
+        _atomic_to_csv(photos_df, photos_csv)
+        _atomic_to_csv(ratings_df, ratings_csv)
+        _atomic_to_csv(users_df, users_csv)
+        return {"photos": len(photos_df), "ratings": len(ratings_df), "users": len(users_df)}
+
+
+def _with_columns(df: pd.DataFrame, columns: list[str]) -> pd.DataFrame:
+    for column in columns:
+        if column not in df.columns:
+            df[column] = None
+    return df[columns]
+
+
+def _read_csv(path: str, columns: list[str]) -> pd.DataFrame:
+    """Read a CSV, tolerating missing/empty files and absent columns."""
+    try:
+        with perf.span("csv.read") as span:
+            df = pd.read_csv(path)
+            span.add_bytes(os.path.getsize(path))
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        df = pd.DataFrame(columns=columns)
+    return _with_columns(df, columns)
+
+
+def _iter_csv(path: str, columns: list[str], chunksize: int = CSV_CHUNK_ROWS):
+    """Yield a CSV in chunks, tolerating missing/empty files and absent columns."""
+    try:
+        reader = pd.read_csv(path, chunksize=chunksize)
+        while True:
+            with perf.span("csv.read"):
+                chunk = next(reader, None)
+            if chunk is None:
+                return
+            yield _with_columns(chunk, columns)
+    except (FileNotFoundError, pd.errors.EmptyDataError):
+        return
+
+
+def _put_base64(blob_store, encoded) -> str | None:
+    """Decode a base64 image into the blob store. Returns its key, or None if unusable."""
+    encoded = _none_if_nan(encoded)
+    if not encoded:
+        return None
+    try:
+        return blob_store.put(base64.b64decode(encoded))
+    except (ValueError, TypeError):
+        return None
+
+
+def migrate_photos_csv(src: str, dst: str, blob_store) -> int:
+    """Stream a photos CSV, moving image_base64 into the blob store. Returns rows written."""
+    tmp_path = f"{dst}.tmp"
+    rows = 0
+    header = True
+    for chunk in _iter_csv(src, PHOTO_COLUMNS + ["image_base64"]):
+        chunk["image_sha256"] = [
+            _put_base64(blob_store, encoded) or _none_if_nan(key)
+            for encoded, key in zip(chunk["image_base64"], chunk["image_sha256"])
+        ]
+        chunk[PHOTO_COLUMNS].to_csv(tmp_path, mode="w" if header else "a", header=header, index=False)
+        header = False
+        rows += len(chunk)
+    if header:
+        pd.DataFrame(columns=PHOTO_COLUMNS).to_csv(tmp_path, index=False)
+    os.replace(tmp_path, dst)
+    return rows
@@ -0,0 +1,74 @@
+"""Incrementally maintained per-photo vote counters.
+
+Counts are adjusted by +1/-1 as votes are cast or moved, and an ordered index
+of (-votes, tiebreak, photo_id) keeps top-N and rank lookups from ever
+rescanning the votes themselves.
+"""
+
+from bisect import bisect_left, insort
+
+
+class VoteTally:
+    def __init__(self) -> None:
+        self._counts: dict[str, int] = {}
+        self._tiebreaks: dict[str, str] = {}
+        self._order: list[tuple[int, str, str]] = []
+
+    def _key(self, photo_id: str) -> tuple[int, str, str]:
+        return (-self._counts[photo_id], self._tiebreaks.get(photo_id, ""), photo_id)
+
+    def _unindex(self, photo_id: str) -> None:
+        if photo_id in self._counts:
+            del self._order[bisect_left(self._order, self._key(photo_id))]
+
+    def reset(self, counts: dict[str, int]) -> None:
+        """Replace all counters (tiebreaks are kept)."""
+        self._counts = dict(counts)
+        self._order = sorted(self._key(photo_id) for photo_id in self._counts)
+
+    def adjust(self, photo_id: str, delta: int) -> None:
+        self._unindex(photo_id)
+        self._counts[photo_id] = self._counts.get(photo_id, 0) + delta
+        insort(self._order, self._key(photo_id))
+
+    def drop(self, photo_id: str) -> None:
+        self._unindex(photo_id)
+        self._counts.pop(photo_id, None)
+        self._tiebreaks.pop(photo_id, None)
+
+    def set_tiebreaks(self, tiebreaks: dict[str, str]) -> None:
+        """Order equal counts by these keys; unknown photos are added with 0 votes."""
+        for photo_id, tiebreak in tiebreaks.items():
+            if photo_id in self._counts and self._tiebreaks.get(photo_id) == tiebreak:
+                continue
+            self._unindex(photo_id)
+            self._tiebreaks[photo_id] = tiebreak
+            self._counts.setdefault(photo_id, 0)
+            insort(self._order, self._key(photo_id))
+
+    def count(self, photo_id: str) -> int:
+        return self._counts.get(photo_id, 0)
+
+    def counts(self) -> dict[str, int]:
+        return dict(self._counts)
+
+    def ranked(self) -> list[tuple[str, int]]:
+        """Every photo as (photo_id, votes), most votes first."""
+        return [(photo_id, -negative_votes) for negative_votes, _, photo_id in self._order]
+
+    def top(self, n: int) -> list[tuple[str, int]]:
+        return [(photo_id, -negative_votes) for negative_votes, _, photo_id in self._order[:n]]
+
+    def rank(self, photo_id: str) -> int | None:
+        """1-based position of a photo, or None if it is unknown."""
+        if photo_id not in self._counts:
+            return None
+        return bisect_left(self._order, self._key(photo_id)) + 1
+
+    def drift(self, expected: dict[str, int]) -> dict[str, tuple[int, int]]:
+        """Photos whose counter differs from expected, as {photo_id: (counted, expected)}."""
+        return {
+            photo_id: (self.count(photo_id), expected.get(photo_id, 0))
+            for photo_id in set(self._counts) | set(expected)
+            if self.count(photo_id) != expected.get(photo_id, 0)
+        }
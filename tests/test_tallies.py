@@ -0,0 +1,28 @@
+"""VoteTally keeps counts and order consistent under +1/-1 adjustments."""
+
+from tallies import VoteTally
+
+
+def test_adjustments_keep_counts_and_ranking_in_step():
+    tally = VoteTally()
+    tally.set_tiebreaks({"a": "2024-01-01", "b": "2024-01-02", "c": "2024-01-03"})
+    for photo_id in ("b", "c", "c"):
+        tally.adjust(photo_id, +1)
+    tally.adjust("c", -1)  # a vote moved away from c
+    tally.adjust("a", +1)
+
+    assert tally.counts() == {"a": 1, "b": 1, "c": 1}
+    # Equal counts are ordered by tiebreak
+    assert tally.ranked() == [("a", 1), ("b", 1), ("c", 1)]
+    assert tally.rank("c") == 3
+    assert tally.drift({"a": 1, "b": 1, "c": 1}) == {}
+
+
+def test_drop_and_drift():
+    tally = VoteTally()
+    tally.reset({"a": 2, "b": 1})
+    tally.drop("a")
+
+    assert tally.ranked() == [("b", 1)]
+    assert tally.rank("a") is None
+    assert tally.drift({"b": 2}) == {"b": (1, 2)}
@@ -0,0 +1,35 @@
+"""UserDirectory follows its own writes and notices everyone else's."""
+
+import storage
+import user_directory
+
+
+def test_a_write_from_elsewhere_racing_our_own_is_picked_up(tmp_path):
+    db = storage.Storage(str(tmp_path / "contest.db"))
+    other = storage.Storage(str(tmp_path / "contest.db"))  # another process's connection
+    db.upsert_user({"employee_id": "E1", "name": "One"})
+
+    def write_then_race(user):
+        version = db.upsert_user(user)
+        # Lands after our write but before the directory looks at the files again
+        other.upsert_user({"employee_id": "E2", "name": "Two"})
+        return version
+
+    directory = user_directory.UserDirectory(db, write=write_then_race)
+    assert directory.get("e1")["name"] == "One"
+    directory.upsert({"employee_id": "E3", "name": "Three"})
+
+    assert directory.get("E2") is not None
+    assert set(directory.lookup(["E1", "E2", "E3"])) == {"E1", "E2", "E3"}
+
+
+def test_own_writes_do_not_rebuild_the_index(tmp_path, monkeypatch):
+    db = storage.Storage(str(tmp_path / "contest.db"))
+    directory = user_directory.UserDirectory(db)
+    directory.get("E1")
+    monkeypatch.setattr(db, "users_frame", lambda: (_ for _ in ()).throw(AssertionError("rebuilt")))
+
+    directory.upsert({"employee_id": "e1", "name": "One"})
+    assert directory.get("E1")["name"] == "One"
+    db.set_meta("unrelated", "x")  # other writes move the files but not the users version
+    assert directory.get("E1")["name"] == "One"
@@ -0,0 +1,170 @@
+"""Invariants of the vote journal: replay, compaction across journals, voter keys.
+
+Two VoteJournal instances on one path stand in for two server processes: each
+opens its own lock file descriptor, so their flocks exclude each other.
+"""
+
+import threading
+
+import pytest
+
+import storage
+import vote_journal
+from vote_journal import OP_DROP_PHOTO, OP_VOTE, VoteState
+
+
+@pytest.fixture
+def db(tmp_path):
+    db = storage.Storage(str(tmp_path / "contest.db"))
+    for photo_id in ("a", "b", "c"):
+        db.insert_photo({"photo_id": photo_id, "title": photo_id, "uploader": "U", "status": "approved"})
+    return db
+
+
+@pytest.fixture
+def open_journal(tmp_path, db):
+    journals = []
+
+    def open_journal():
+        journal = vote_journal.VoteJournal(str(tmp_path / "votes.journal"), db, compact_interval=3600)
+        journals.append(journal)
+        return journal
+
+    yield open_journal
+    for journal in journals:
+        journal.close()
+
+
+def test_replaying_records_on_a_snapshot_that_contains_them_is_idempotent():
+    records = [
+        (OP_VOTE, "a", "U1", 1),
+        (OP_VOTE, "b", "U2", 1),
+        (OP_VOTE, "b", "U1", 1),  # U1 moves to b
+        (OP_VOTE, "c", "U3", 1),
+        (OP_DROP_PHOTO, "c", "", 0),
+    ]
+    once = VoteState()
+    once.apply(records)
+    # A crash between folding and truncating replays the journal on the folded snapshot
+    replayed = VoteState(once.votes)
+    replayed.apply(records)
+
+    assert replayed.votes == once.votes == {"U1": ("b", 1), "U2": ("b", 1)}
+    assert replayed.tally.counts() == once.tally.counts()
+    assert replayed.tally.ranked() == once.tally.ranked()
+    assert replayed.tally.top(1) == [("b", 2)]
+
+
+def test_compacted_journal_replays_to_the_same_state(open_journal):
+    journal = open_journal()
+    journal.record_vote("a", "U1", 1)
+    journal.record_vote("b", "U2", 1)
+    journal.record_vote("b", "U1", 1)
+    before = journal.votes()
+
+    assert journal.compact() == 3
+    assert journal.votes() == before
+    assert open_journal().votes() == before
+    assert journal.verify_tallies() == {}
+
+
+def test_live_tally_matches_verify_after_compaction_by_another_journal(open_journal):
+    first, second = open_journal(), open_journal()
+    first.record_vote("a", "U1", 1)
+    first.vote_counts()
+
+    # The other journal compacts and appends between first's sync and its exclusive lock
+    sync = first._sync
+    raced = []
+
+    def racing_sync():
+        sync()
+        if not raced:
+            raced.append(True)
+            second.compact()
+            second.record_vote("c", "U2", 1)
+
+    first._sync = racing_sync
+    first.compact()
+
+    assert first.vote_counts() == {"a": 1, "c": 1}
+    assert first.verify_tallies() == {}
+    assert second.vote_counts() == first.vote_counts()
+
+
+def test_ids_differing_only_in_case_are_one_voter(open_journal):
+    journal = open_journal()
+    journal.record_vote("b", "E3", 1)
+    journal.record_vote("a", "e3", 1)
+    journal.record_vote("b", "E4", 1)
+
+    assert journal.vote_counts() == {"a": 1, "b": 1}
+    assert journal.user_vote("e3") == journal.user_vote(" E3 ") == "a"
+    journal.compact()
+    assert journal.vote_counts() == {"a": 1, "b": 1}
+    assert journal.verify_tallies() == {}
+
+
+def test_ids_longer_than_a_record_are_rejected():
+    with pytest.raises(ValueError):
+        vote_journal.encode_record(OP_VOTE, "a", "X" * (vote_journal.MAX_ID_BYTES + 1), 1)
+
+
+def _append_damaged_record(path):
+    # A full-size record that fails its CRC, as a zero-filled block left by a crash
+    with open(path, "ab") as f:
+        f.write(b"\0" * vote_journal.RECORD_SIZE)
+
+
+def test_votes_after_a_damaged_record_survive_reopening_and_compaction(tmp_path, open_journal):
+    journal = open_journal()
+    journal.record_vote("a", "U1", 1)
+    journal.close()
+    _append_damaged_record(tmp_path / "votes.journal")
+
+    reopened = open_journal()
+    reopened.record_vote("b", "U2", 1)
+    assert reopened.vote_counts() == {"a": 1, "b": 1}
+    assert reopened.compact() == 2
+    assert open_journal().votes() == {"U1": ("a", 1), "U2": ("b", 1)}
+
+
+def test_compaction_keeps_votes_appended_after_a_damaged_record(tmp_path, open_journal):
+    journal = open_journal()
+    journal.record_vote("a", "U1", 1)
+    _append_damaged_record(tmp_path / "votes.journal")
+    journal.record_vote("b", "U2", 1)
+
+    assert journal.compact() == 2
+    assert journal.vote_counts() == {"a": 1, "b": 1}
+    assert journal.verify_tallies() == {}
+    assert open_journal().votes() == {"U1": ("a", 1), "U2": ("b", 1)}
+
+
+def test_rejected_appends_write_nothing(open_journal):
+    journal = open_journal()
+    assert journal.record_vote("a", "U1", 1, accept=lambda: True)
+    assert not journal.record_vote("b", "U1", 1, accept=lambda: False)
+    assert journal.votes() == {"U1": ("a", 1)}
+    assert journal.pending_records() == 1
+
+
+def test_a_vote_checked_before_a_delete_is_appended_before_the_drop(db, open_journal):
+    voter, deleter = open_journal(), open_journal()
+    deleted = []
+
+    def accept():
+        # The photo is deleted (row, then drop record) while this vote sits between check and write
+        exists = db.photo_exists("c")
+        thread = threading.Thread(target=lambda: (db.delete_photo("c"), deleter.record_photo_deleted("c")))
+        thread.start()
+        deleted.append(thread)
+        thread.join(timeout=0.2)
+        return exists
+
+    assert voter.record_vote("c", "U1", 1, accept=accept)
+    deleted[0].join()
+    assert voter.vote_counts().get("c", 0) == 0
+    voter.compact()
+    assert voter.votes() == {}
+    assert voter.verify_tallies() == {}
@@ -0,0 +1,109 @@
+"""Process-wide employee_id -> user record index.
+
+The index is built once from the users table and kept current by the writes
+made through it, so per-card uploader lookups are dictionary hits instead of
+frame scans. Writes from elsewhere (another process, a CSV import) are picked
+up by a (mtime_ns, size) check of the database files: when the files changed,
+the users table's version counter (bumped by a trigger on every change) is
+compared with the version the index reflects, and only a different version
+triggers a rebuild. A write made here returns the new version; the index
+follows it only if it is exactly one past the version it already had.
+"""
+
+import os
+import threading
+
+_instances: dict[str, "UserDirectory"] = {}
+_instances_lock = threading.Lock()
+
+
+def open_user_directory(storage, **options) -> "UserDirectory":
+    """Return the process-wide UserDirectory for a storage engine, creating it on first use."""
+    with _instances_lock:
+        directory = _instances.get(storage.db_path)
+        if directory is None:
+            directory = UserDirectory(storage, **options)
+            _instances[storage.db_path] = directory
+        return directory
+
+
+def normalize(employee_id) -> str:
+    return str(employee_id).strip().upper()
+
+
+class UserDirectory:
+    def __init__(self, storage, write=None) -> None:
+        self.storage = storage
+        # How a user row is written (returns the new users_version); defaults to storage.upsert_user
+        self._write = write or storage.upsert_user
+        self._paths = [storage.db_path, f"{storage.db_path}-wal"]
+        self._lock = threading.Lock()
+        self._index: dict[str, dict] = {}
+        self._token = None
+        # users_version the index reflects; None when it must be rebuilt
+        self._version = None
+
+    def _file_token(self) -> tuple:
+        token = []
+        for path in self._paths:
+            try:
+                st = os.stat(path)
+                token.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                token.append(None)
+        return tuple(token)
+
+    def _current(self) -> dict[str, dict]:
+        """The index, rebuilt first if the database changed behind our back. Caller holds _lock."""
+        token = self._file_token()
+        if token != self._token:
+            # Read before the rows, so a write racing the rebuild shows up as a newer version next time
+            version = self.storage.users_version()
+            if version != self._version:
+                users_df = self.storage.users_frame()
+                users_df = users_df.astype(object).where(users_df.notna(), None)
+                self._index = {normalize(user["employee_id"]): user for user in users_df.to_dict("records")}
+                self._version = version
+            self._token = token
+        return self._index
+
+    def get(self, employee_id: str) -> dict | None:
+        with self._lock:
+            user = self._current().get(normalize(employee_id))
+            return dict(user) if user is not None else None
+
+    def lookup(self, employee_ids) -> dict[str, dict]:
+        """Records for many IDs at once, keyed by normalized ID; unknown IDs are left out."""
+        with self._lock:
+            index = self._current()
+            found = {}
+            for employee_id in employee_ids:
+                key = normalize(employee_id)
+                if key in index:
+                    found[key] = dict(index[key])
+            return found
+
+    def upsert(self, user: dict) -> dict:
+        """Write a user through to storage and update the index in place."""
+        with self._lock:
+            self._current()
+            expected = self._version
+            version = self._write(user)
+            key = normalize(user["employee_id"])
+            # Mirror the upsert: an existing user keeps their admin flag
+            previous = self._index.get(key)
+            record = {
+                "employee_id": key,
+                "name": user.get("name"),
+                "posting_details": user.get("posting_details"),
+                "is_admin": previous["is_admin"] if previous else bool(user.get("is_admin", False)),
+            }
+            self._index[key] = record
+            if expected is not None and version == expected + 1:
+                self._version = version
+            else:
+                # Someone else changed the users table too; rebuild on the next read
+                self._version = None
+            # Our write moved the file stats; the next read re-checks the version rather than adopting them
+            self._token = None
+            return dict(record)
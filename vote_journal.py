@@ -0,0 +1,465 @@
+"""Append-only vote journal with background compaction.
+
+Every vote (or vote move) is appended to the journal as one fixed-size record,
+so save_rating costs O(1) regardless of how many votes exist. A compactor
+periodically folds the journal into the ratings table of the SQLite storage
+(the snapshot) and starts a fresh, empty journal. Readers rebuild the current
+state from the snapshot plus the journal tail.
+
+Replaying a journal on top of a snapshot that already contains it yields the
+same state (a vote record sets the user's vote, a drop record clears a photo),
+so a crash between folding and truncating the journal is harmless.
+"""
+
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+import pandas as pd
+
+import perf
+from storage import normalize_id
+from tallies import VoteTally
+
+# fcntl is POSIX-only; without it the journal is safe within a single process
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+
+OP_VOTE = 1  # user_id now votes for photo_id
+OP_DROP_PHOTO = 2  # photo_id was deleted; clear every vote for it
+
+# Longest photo_id / user_id a record can hold, in UTF-8 bytes
+MAX_ID_BYTES = 64
+
+# op, rating, timestamp, photo_id, user_id, followed by a crc32 of those fields
+_BODY = struct.Struct(f"<Bbd{MAX_ID_BYTES}s{MAX_ID_BYTES}s")
+_CRC = struct.Struct("<I")
+RECORD_SIZE = _BODY.size + _CRC.size
+
+FSYNC_POLICIES = ("always", "interval", "never")
+
+_instances: dict[str, "VoteJournal"] = {}
+_instances_lock = threading.Lock()
+
+
+def open_journal(path: str, storage, **options) -> "VoteJournal":
+    """Return the process-wide VoteJournal for path, creating it on first use."""
+    path = os.path.abspath(path)
+    with _instances_lock:
+        journal = _instances.get(path)
+        if journal is None:
+            journal = VoteJournal(path, storage, **options)
+            _instances[path] = journal
+        return journal
+
+
+def encode_record(op: int, photo_id: str, user_id: str = "", rating: int = 0) -> bytes:
+    """Pack one journal record. IDs longer than MAX_ID_BYTES are rejected."""
+    photo_bytes = photo_id.encode("utf-8")
+    user_bytes = user_id.encode("utf-8")
+    if len(photo_bytes) > MAX_ID_BYTES or len(user_bytes) > MAX_ID_BYTES:
+        raise ValueError(f"photo_id and user_id must fit in {MAX_ID_BYTES} bytes")
+    body = _BODY.pack(op, rating, time.time(), photo_bytes, user_bytes)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def split_valid(data: bytes) -> tuple[list[bytes], int]:
+    """Complete records whose CRC checks out, and how many bytes of data are not among them."""
+    valid = []
+    for start in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+        record = data[start:start + RECORD_SIZE]
+        (crc,) = _CRC.unpack_from(record, _BODY.size)
+        if zlib.crc32(record[:_BODY.size]) == crc:
+            valid.append(record)
+    return valid, len(data) - len(valid) * RECORD_SIZE
+
+
+def decode_records(data: bytes) -> list[tuple[int, str, str, int]]:
+    """Unpack complete records as (op, photo_id, user_id, rating), stopping at a torn one."""
+    records = []
+    for start in range(0, len(data) - RECORD_SIZE + 1, RECORD_SIZE):
+        body = data[start:start + _BODY.size]
+        (crc,) = _CRC.unpack_from(data, start + _BODY.size)
+        if zlib.crc32(body) != crc:
+            break
+        op, rating, _, photo_bytes, user_bytes = _BODY.unpack(body)
+        records.append((
+            op,
+            photo_bytes.rstrip(b"\0").decode("utf-8"),
+            user_bytes.rstrip(b"\0").decode("utf-8"),
+            rating,
+        ))
+    return records
+
+
+class VoteState:
+    """Current votes plus the indexes derived from them.
+
+    Holds {user_id: (photo_id, rating)}, the voters of each photo (so a dropped
+    photo costs O(its votes)) and a VoteTally adjusted by +1/-1 per change.
+    """
+
+    def __init__(self, votes: dict[str, tuple[str, int]] | None = None, tally: VoteTally | None = None) -> None:
+        self.votes: dict[str, tuple[str, int]] = {}
+        self.voters: dict[str, set[str]] = {}
+        self.tally = tally or VoteTally()
+        for user_id, (photo_id, rating) in (votes or {}).items():
+            self.votes[user_id] = (photo_id, rating)
+            self.voters.setdefault(photo_id, set()).add(user_id)
+        self.tally.reset({photo_id: len(users) for photo_id, users in self.voters.items()})
+
+    def apply(self, records: list[tuple[int, str, str, int]]) -> None:
+        for op, photo_id, user_id, rating in records:
+            if op == OP_VOTE:
+                # Journals written before IDs were normalized on append
+                user_id = normalize_id(user_id)
+                previous = self.votes.get(user_id)
+                if previous is not None:
+                    if previous[0] == photo_id:
+                        self.votes[user_id] = (photo_id, rating)
+                        continue
+                    self.voters[previous[0]].discard(user_id)
+                    self.tally.adjust(previous[0], -1)
+                self.votes[user_id] = (photo_id, rating)
+                self.voters.setdefault(photo_id, set()).add(user_id)
+                self.tally.adjust(photo_id, +1)
+            elif op == OP_DROP_PHOTO:
+                for voter in self.voters.pop(photo_id, ()):
+                    del self.votes[voter]
+                self.tally.drop(photo_id)
+
+
+class VoteJournal:
+    """Vote log in front of the storage ratings table.
+
+    All journal operations in a process are serialized by one lock. Across
+    processes, appends and reads hold a shared flock and compaction holds an
+    exclusive one, so a reader never sees a half-folded snapshot.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        storage,
+        fsync: str = "interval",
+        fsync_interval: float = 1.0,
+        compact_interval: float = 30.0,
+        compact_min_records: int = 1,
+    ) -> None:
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+        self.path = path
+        self.storage = storage
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_interval = compact_interval
+        self.compact_min_records = compact_min_records
+
+        self._lock = threading.RLock()
+        self._lock_fd = os.open(f"{path}.lock", os.O_RDWR | os.O_CREAT, 0o644)
+        self._append_fd = None
+        self._dirty = False
+
+        # Reader state: snapshot plus the part of the journal read so far.
+        # Keeping the journal open pins its inode, so a replaced file is always detected.
+        self._reader = None
+        self._read_offset = 0
+        self._state = VoteState()
+        # Bumped whenever this process appends or sees the vote state change
+        self.generation = 0
+
+        self._prepare_file()
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._background, name="vote-journal", daemon=True)
+        self._worker.start()
+
+    # Locking
+
+    def _flock(self, exclusive: bool = False) -> None:
+        if FCNTL_AVAILABLE:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _funlock(self) -> None:
+        if FCNTL_AVAILABLE:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _prepare_file(self) -> None:
+        """Create the journal if missing and drop damaged records left by a crash."""
+        with self._lock:
+            self._flock(exclusive=True)
+            try:
+                os.close(os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o644))
+                self._repair_locked()
+            finally:
+                self._funlock()
+
+    def _repair_locked(self) -> bool:
+        """Rewrite the journal without records failing their CRC or a partial tail; caller holds the exclusive flock.
+
+        Readers stop at the first record that doesn't check out, so one damaged
+        record (e.g. a zero-filled block after a crash under the interval fsync
+        policy) would hide every vote appended after it. The valid records are
+        kept, in order, in a new file; readers see a replaced file and reload.
+        Returns True if the file was rewritten.
+        """
+        with open(self.path, "rb") as f:
+            data = f.read()
+        valid, dropped = split_valid(data)
+        if not dropped:
+            return False
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(valid))
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        return True
+
+    @staticmethod
+    def _is_current(f, path: str) -> bool:
+        try:
+            return os.fstat(f if isinstance(f, int) else f.fileno()).st_ino == os.stat(path).st_ino
+        except FileNotFoundError:
+            return False
+
+    # Writing
+
+    def append(self, records: list[bytes], accept=None, exclusive: bool = False) -> bool:
+        """Append encoded records in a single write, honouring the fsync policy.
+
+        accept(), if given, is called under the journal locks just before the
+        write; when it returns False nothing is appended. An exclusive append
+        waits until no other process is between its accept() and its write.
+        Returns whether the records were appended.
+        """
+        if not records:
+            return False
+        data = b"".join(records)
+        with self._lock:
+            self._flock(exclusive=exclusive)
+            try:
+                if accept is not None and not accept():
+                    return False
+                if self._append_fd is None or not self._is_current(self._append_fd, self.path):
+                    if self._append_fd is not None:
+                        os.close(self._append_fd)
+                    self._append_fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+                with perf.span("journal.append") as span:
+                    os.write(self._append_fd, data)
+                    span.add_bytes(len(data))
+                    self.generation += 1
+                    if self.fsync == "always":
+                        os.fsync(self._append_fd)
+                    else:
+                        self._dirty = True
+            finally:
+                self._funlock()
+        return True
+
+    @contextmanager
+    def appends_paused(self):
+        """Hold the exclusive flock for the block, so no process is between an accept() check and its write.
+
+        The block must not call other journal methods, which take the flock themselves.
+        """
+        with self._lock:
+            self._flock(exclusive=True)
+            try:
+                yield
+            finally:
+                self._funlock()
+
+    def record_vote(self, photo_id: str, user_id: str, rating: int, accept=None) -> bool:
+        # Same key as the ratings table, so "e3" and "E3" are one voter in the journal and the tally
+        return self.append([encode_record(OP_VOTE, photo_id, normalize_id(user_id), rating)], accept=accept)
+
+    def record_photo_deleted(self, photo_id: str) -> None:
+        # Exclusive: a vote that saw the photo before its row was deleted is appended before this record
+        self.append([encode_record(OP_DROP_PHOTO, photo_id)], exclusive=True)
+
+    def flush(self) -> None:
+        """fsync appends made under the interval/never policies."""
+        with self._lock:
+            if self._dirty and self._append_fd is not None:
+                os.fsync(self._append_fd)
+            self._dirty = False
+
+    # Reading
+
+    def _sync(self) -> None:
+        """Bring the in-memory vote state up to date with snapshot plus tail."""
+        self._flock()
+        try:
+            if self._reader is None or not self._is_current(self._reader, self.path):
+                # First read, or the journal was compacted elsewhere: reload the snapshot
+                if self._reader is not None:
+                    self._reader.close()
+                self._reader = open(self.path, "rb")
+                self._read_offset = 0
+                self._state = VoteState(self._load_snapshot(), tally=self._state.tally)
+                self.generation += 1
+            self._reader.seek(self._read_offset)
+            data = self._reader.read()
+            records = decode_records(data[:len(data) - len(data) % RECORD_SIZE])
+            if records:
+                self._state.apply(records)
+                self._read_offset += len(records) * RECORD_SIZE
+                self.generation += 1
+        finally:
+            self._funlock()
+
+    def _load_snapshot(self) -> dict[str, tuple[str, int]]:
+        ratings = self.storage.ratings_frame()
+        return {
+            user_id: (photo_id, int(rating))
+            for photo_id, user_id, rating in ratings.itertuples(index=False)
+        }
+
+    def votes(self) -> dict[str, tuple[str, int]]:
+        """Current {user_id: (photo_id, rating)} mapping."""
+        with self._lock:
+            self._sync()
+            return dict(self._state.votes)
+
+    def user_vote(self, user_id: str) -> str | None:
+        """photo_id the user currently votes for, if any."""
+        with self._lock:
+            self._sync()
+            vote = self._state.votes.get(normalize_id(user_id))
+            return vote[0] if vote else None
+
+    def ratings_frame(self) -> pd.DataFrame:
+        """Current votes as a photo_id/user_id/rating frame.
+
+        The IDs are categoricals, so each row holds two integer keys into shared
+        dictionaries of photo and user IDs instead of two strings.
+        """
+        votes = self.votes()
+        return pd.DataFrame({
+            "photo_id": pd.Categorical([photo_id for photo_id, _ in votes.values()]),
+            "user_id": pd.Categorical(list(votes)),
+            "rating": pd.Series([rating for _, rating in votes.values()], dtype="int8"),
+        })
+
+    def ranked_photos(self, tiebreaks: dict[str, str] | None = None) -> list[tuple[str, int]]:
+        """Every photo with a counter as (photo_id, votes), most votes first.
+
+        tiebreaks orders photos with equal votes and registers photos that have
+        no votes yet.
+        """
+        with self._lock:
+            self._sync()
+            if tiebreaks:
+                self._state.tally.set_tiebreaks(tiebreaks)
+            return self._state.tally.ranked()
+
+    def vote_counts(self) -> dict[str, int]:
+        with self._lock:
+            self._sync()
+            return self._state.tally.counts()
+
+    def verify_tallies(self) -> dict[str, tuple[int, int]]:
+        """Recompute counts from the snapshot and journal from scratch; return any drift."""
+        with self._lock:
+            while True:
+                self._sync()
+                self._flock()
+                try:
+                    if not self._is_current(self._reader, self.path):
+                        continue  # Compacted between sync and lock; sync again
+                    # Rebuild exactly what the live state has applied: snapshot + journal up to our offset
+                    rebuilt = VoteState(self._load_snapshot())
+                    self._reader.seek(0)
+                    rebuilt.apply(decode_records(self._reader.read(self._read_offset)))
+                    return self._state.tally.drift(rebuilt.tally.counts())
+                finally:
+                    self._funlock()
+
+    def pending_records(self) -> int:
+        """Number of records not yet folded into the snapshot."""
+        try:
+            return os.path.getsize(self.path) // RECORD_SIZE
+        except FileNotFoundError:
+            return 0
+
+    # Compaction
+
+    def compact(self) -> int:
+        """Fold the journal into the snapshot and start an empty journal. Returns records folded."""
+        with self._lock:
+            while True:
+                self._sync()
+                self._flock(exclusive=True)
+                try:
+                    if not self._is_current(self._reader, self.path):
+                        continue  # Compacted elsewhere between sync and lock; sync again
+                    if self._repair_locked():
+                        continue  # Damaged records were dropped; read the rewritten file first
+                    return self._compact_locked()
+                finally:
+                    self._funlock()
+
+    def _compact_locked(self) -> int:
+        """compact() once our reader follows the current file; caller holds the exclusive flock."""
+        with open(self.path, "rb") as f:
+            data = f.read()
+        records = decode_records(data)
+        if not records or len(records) * RECORD_SIZE != len(data):
+            # Never replace a journal holding bytes that were not folded (compact() repairs it first)
+            return 0
+        self._fold(records)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+        # Our state already includes every folded record; follow the new file
+        # without reloading the snapshot. Another process may have appended
+        # after our sync, so apply anything we had not read yet.
+        self._state.apply(records[self._read_offset // RECORD_SIZE:])
+        self._reader.close()
+        self._reader = open(self.path, "rb")
+        self._read_offset = 0
+        return len(records)
+
+    def _fold(self, records: list[tuple[int, str, str, int]]) -> None:
+        """Apply records, in order, to the snapshot in one storage transaction."""
+        with self.storage.transaction():
+            for op, photo_id, user_id, rating in records:
+                if op == OP_VOTE:
+                    self.storage.upsert_rating(photo_id, user_id, rating, check_photo=False)
+                elif op == OP_DROP_PHOTO:
+                    self.storage.delete_photo_ratings(photo_id)
+
+    def _background(self) -> None:
+        last_compact = time.monotonic()
+        while not self._stop.wait(self.fsync_interval):
+            try:
+                if self.fsync == "interval":
+                    self.flush()
+                if time.monotonic() - last_compact >= self.compact_interval:
+                    last_compact = time.monotonic()
+                    if self.pending_records() >= self.compact_min_records:
+                        self.compact()
+            except Exception:
+                pass  # Keep the worker alive; the next tick retries
+
+    def close(self) -> None:
+        self._stop.set()
+        self._worker.join(timeout=5)
+        self.flush()
+        with self._lock:
+            if self._append_fd is not None:
+                os.close(self._append_fd)
+                self._append_fd = None
+            if self._reader is not None:
+                self._reader.close()
+                self._reader = None